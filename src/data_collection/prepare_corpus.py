@@ -21,6 +21,15 @@ from slugify import slugify
 
 enc = tiktoken.get_encoding("cl100k_base")      # GPT-4 series tokenizer
 
+try:
+    import orjson
+
+    def _load_json(fp):
+        return orjson.loads(pathlib.Path(fp).read_bytes())
+except ImportError:             # optional: C parser, 2-5x faster
+    def _load_json(fp):
+        return json.load(open(fp, encoding="utf-8"))
+
 # ─────────── utils ────────────
 WS = re.compile(r"\s+")
 
@@ -165,7 +174,7 @@ def build_corpus(in_dir: str, use_improved_chunking: bool = False) -> List[Dict]
         chunk_function = iter_chunks
     
     for fp in glob.glob(f"{in_dir.rstrip('/')}/**/*.json", recursive=True):
-        rec = json.load(open(fp, encoding="utf-8"))
+        rec = _load_json(fp)
         for chunk in chunk_function(rec):
             if len(chunk["text"]) < 30:
                 continue
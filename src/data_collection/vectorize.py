@@ -4,21 +4,33 @@
 vectorize.py  ·  TUM program data vectorization
 ------------------------------------------
 Read JSONL file →
-  · Use Google Gemini for vectorization
+  · Use Google Gemini (or a local sentence-transformers model) for vectorization
   · Build FAISS index
   · Save vectors and index
 
+The backend and model must match the retriever config
+(embed_backend / local_embed_model), or every query-time search would
+run with the wrong vector dimension.
+
 Usage
 -----
 python vectorize.py \
     --in_file data/processed/tum_program_docs.jsonl \
     --out_dir data/vectors \
     --model models/embedding-001
+
+python vectorize.py --backend local --local_model BAAI/bge-small-en-v1.5
 """
 import os
 import json
 import argparse
 import pathlib
+
+try:
+    import orjson
+    _loads = orjson.loads       # C parser, 2-5x faster on dict-heavy JSONL
+except ImportError:
+    _loads = json.loads
 from dotenv import load_dotenv
 from langchain_community.vectorstores import FAISS
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
@@ -26,10 +38,6 @@ from langchain.docstore.document import Document
 
 
 load_dotenv()
-api_key = os.getenv("GOOGLE_API_KEY")
-if not api_key:
-    raise ValueError("GOOGLE_API_KEY environment variable is required")
-# Get the workspace root directory (2 levels up from this script)
 
 
 def load_docs_to_lc(in_file):
@@ -37,7 +45,7 @@ def load_docs_to_lc(in_file):
     docs = []
     with open(in_file, encoding="utf-8") as f:
         for line in f:
-            obj = json.loads(line)
+            obj = _loads(line)
             docs.append(Document(
                 page_content=obj["text"],
                 metadata={**obj["metadata"], "id": obj["id"]}
@@ -54,6 +62,14 @@ def main():
                     help="Vector store output directory")
     ap.add_argument("--model",   default="models/embedding-001",
                     help="Google Gemini embedding model")
+    ap.add_argument("--backend", choices=("google", "local"), default="google",
+                    help="Embedding backend; must match embed_backend in the "
+                         "retriever config")
+    ap.add_argument("--local_model", default="BAAI/bge-small-en-v1.5",
+                    help="sentence-transformers model for --backend local")
+    ap.add_argument("--normalize", action="store_true",
+                    help="L2-normalize vectors and build an inner-product index; "
+                         "search scores are then cosine similarity directly")
     args = ap.parse_args()
 
     print("🗂  Loading JSONL …")
@@ -61,8 +77,27 @@ def main():
     print(f"Loaded {len(lc_docs)} documents")
 
     print("🔄  Embedding & building FAISS store …")
-    embedder = GoogleGenerativeAIEmbeddings(model=args.model, google_api_key=api_key)
-    vectordb  = FAISS.from_documents(lc_docs, embedder)
+    if args.backend == "local":
+        # Mirror the retriever's query-side settings: same model and
+        # normalized vectors, so index and queries live in the same space
+        from langchain_community.embeddings import HuggingFaceEmbeddings
+        embedder = HuggingFaceEmbeddings(
+            model_name=args.local_model,
+            encode_kwargs={"normalize_embeddings": True})
+    else:
+        api_key = os.getenv("GOOGLE_API_KEY")
+        if not api_key:
+            raise ValueError("GOOGLE_API_KEY environment variable is required")
+        embedder = GoogleGenerativeAIEmbeddings(model=args.model, google_api_key=api_key)
+    store_kwargs = {}
+    if args.normalize:
+        # IndexFlatIP over unit vectors returns cosine directly, so the
+        # retrievers skip their 1 - distance conversion (they detect the
+        # metric from the index at load time)
+        from langchain_community.vectorstores.utils import DistanceStrategy
+        store_kwargs = {"normalize_L2": True,
+                        "distance_strategy": DistanceStrategy.MAX_INNER_PRODUCT}
+    vectordb  = FAISS.from_documents(lc_docs, embedder, **store_kwargs)
 
     out_dir = pathlib.Path(args.out_dir)
     out_dir.mkdir(parents=True, exist_ok=True)
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+build_ann_index.py  ·  One-off conversion of the flat FAISS index to ANN
+------------------------------------------------------------------------
+Rebuilds data/embeddings/index.faiss as an ANN index:
+
+* ivfpq (default) - IVF with int8 product-quantized codes. The flat
+  index scans every FP32 vector per query; IVF visits only `nprobe` of
+  `nlist` clusters and PQ shrinks each vector from d*4 bytes to `m`.
+* hnsw - IndexHNSWFlat graph index; log-time traversal, exact vectors.
+  Tune recall/speed at query time with `efSearch` in the retriever
+  config.
+* sq8 - IndexScalarQuantizer with 8-bit codes. Still an exhaustive
+  scan, but reads a quarter of the bytes per query - flat search is
+  memory-bandwidth bound, so this is the safe speedup when IVF/HNSW
+  recall trade-offs are unwanted.
+
+The docstore (index.pkl) is untouched: row i of the new index still maps
+to the same document, so the retrievers need no code change. The old
+index is kept next to the new one as index.faiss.bak.
+
+Usage
+-----
+python build_ann_index.py --nlist 1024 --m 96 --nprobe 16
+python build_ann_index.py --index_type hnsw --hnsw_m 32
+python build_ann_index.py --index_type sq8
+"""
+import argparse
+import pathlib
+import shutil
+
+ROOT = pathlib.Path(__file__).resolve().parents[2]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--index_dir", default=str(ROOT / "data" / "embeddings"),
+                    help="Directory holding index.faiss")
+    ap.add_argument("--index_type", choices=("ivfpq", "hnsw", "sq8"), default="ivfpq",
+                    help="ANN index type to build")
+    ap.add_argument("--hnsw_m", type=int, default=32,
+                    help="HNSW graph connectivity (links per node)")
+    ap.add_argument("--ef_construction", type=int, default=200,
+                    help="HNSW build-time search width")
+    ap.add_argument("--nlist", type=int, default=1024,
+                    help="Number of IVF clusters (clamped for small corpora)")
+    ap.add_argument("--m", type=int, default=96,
+                    help="PQ sub-quantizers; must divide the embedding dim")
+    ap.add_argument("--nprobe", type=int, default=16,
+                    help="Clusters probed per query (persisted in the index)")
+    args = ap.parse_args()
+
+    import faiss
+
+    index_path = pathlib.Path(args.index_dir) / "index.faiss"
+    flat = faiss.read_index(str(index_path))
+    xb = flat.reconstruct_n(0, flat.ntotal)
+    d = flat.d
+
+    if args.index_type == "hnsw":
+        print(f"🔄  Building HNSW (d={d}, M={args.hnsw_m}) over {flat.ntotal} vectors …")
+        index = faiss.IndexHNSWFlat(d, args.hnsw_m)
+        index.hnsw.efConstruction = args.ef_construction
+        index.add(xb)
+        detail = f"M={args.hnsw_m}, set efSearch in the retriever config"
+    elif args.index_type == "sq8":
+        print(f"🔄  Building SQ8 (d={d}) over {flat.ntotal} vectors …")
+        # Keep the source metric so cosine/IP stores stay cosine/IP
+        index = faiss.IndexScalarQuantizer(d, faiss.ScalarQuantizer.QT_8bit,
+                                           flat.metric_type)
+        index.train(xb)
+        index.add(xb)
+        detail = "8-bit scalar codes, ~4x less scan bandwidth"
+    else:
+        # faiss wants roughly 39 training points per cluster; clamp nlist so
+        # small corpora still train cleanly
+        nlist = min(args.nlist, max(1, flat.ntotal // 39))
+        if nlist < args.nlist:
+            print(f"⚠️  Clamping nlist {args.nlist} -> {nlist} for {flat.ntotal} vectors")
+
+        print(f"🔄  Training IVFPQ (d={d}, nlist={nlist}, m={args.m}) on {flat.ntotal} vectors …")
+        quantizer = faiss.IndexFlatL2(d)
+        index = faiss.IndexIVFPQ(quantizer, d, nlist, args.m, 8)
+        index.train(xb)
+        index.add(xb)
+        index.nprobe = args.nprobe
+        detail = f"nprobe={args.nprobe}"
+
+    shutil.copy2(index_path, index_path.with_suffix(".faiss.bak"))
+    faiss.write_index(index, str(index_path))
+    print(f"✅ {args.index_type} index written to {index_path} ({detail}, "
+          f"old flat index kept as index.faiss.bak)")
+
+
+if __name__ == "__main__":
+    main()
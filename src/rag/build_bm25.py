@@ -1,10 +1,12 @@
 # build_bm25.py
-import json, pickle, pathlib, re, os
+import json, pickle, pathlib, re, os, sys
 from dotenv import load_dotenv
-from rank_bm25 import BM25Okapi
 from langchain_community.vectorstores import FAISS
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 
+sys.path.insert(0, str(pathlib.Path(__file__).parent / "retriever"))
+from bm25_index import BM25Index
+
 load_dotenv()
 api_key = os.getenv("GOOGLE_API_KEY")
 if not api_key:
@@ -19,15 +21,18 @@ vectordb = FAISS.load_local(DOCSTORE_DIR, emb,
                             allow_dangerous_deserialization=True)
 docs = list(vectordb.docstore._dict.values())
 
-# 2. Build BM25 index
+# 2. Build BM25 index as int32/float32 numpy arrays
+_TOKEN_RE = re.compile(r"\w+")
+
 def tokenize(text):
-    return re.findall(r"\w+", text.lower())
+    return _TOKEN_RE.findall(text.lower())
 
 corpus_tokens = [tokenize(d.page_content) for d in docs]
-bm25 = BM25Okapi(corpus_tokens)
+bm25 = BM25Index.build(corpus_tokens)
 
-# 3. Serialize and save
+# 3. Serialize and save: arrays via np.savez, docs pickled alongside
+bm25.save(DOCSTORE_DIR)
 with open(f"{DOCSTORE_DIR}/bm25.pkl", "wb") as f:
-    pickle.dump({"bm25": bm25, "docs": docs}, f)
+    pickle.dump({"docs": docs}, f)
 
-print(f"✅ BM25 index saved ({len(docs)} docs)")
+print(f"✅ BM25 index saved ({len(docs)} docs, {len(bm25.vocab)} terms)")
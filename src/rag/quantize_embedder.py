@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+quantize_embedder.py  ·  One-off INT8 export of the local embedding model
+-------------------------------------------------------------------------
+Exports the sentence-transformers embedder to ONNX and applies dynamic
+INT8 quantization (AVX-512 VNNI) via optimum, for use with the
+`embed_backend: local` setting in the retriever config. Point
+sentence-transformers at the export directory (local_embed_model) to
+run the quantized model.
+
+Usage
+-----
+python quantize_embedder.py \
+    --model BAAI/bge-small-en-v1.5 \
+    --out_dir data/models/bge-small-en-v1.5-onnx
+"""
+import argparse
+import pathlib
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--model", default="BAAI/bge-small-en-v1.5",
+                    help="Embedding model to export")
+    ap.add_argument("--out_dir", default="data/models/bge-small-en-v1.5-onnx",
+                    help="Directory for the quantized ONNX model")
+    args = ap.parse_args()
+
+    from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+    out_dir = pathlib.Path(args.out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    print(f"🔄  Exporting {args.model} to ONNX …")
+    model = ORTModelForFeatureExtraction.from_pretrained(args.model, export=True)
+    model.save_pretrained(out_dir)
+
+    print("🔄  Applying INT8 dynamic quantization (AVX-512 VNNI) …")
+    quantizer = ORTQuantizer.from_pretrained(out_dir)
+    qconfig = AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+    quantizer.quantize(save_dir=out_dir, quantization_config=qconfig)
+
+    print(f"✅ Quantized embedder saved to {out_dir} "
+          f"(point local_embed_model at it)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+quantize_reranker.py  ·  One-off INT8 export of the cross-encoder reranker
+--------------------------------------------------------------------------
+Exports the reranker to ONNX and applies dynamic INT8 quantization
+(AVX-512 VNNI) via optimum, for use with the `reranker_backend: onnx`
+setting in the retriever config.
+
+Usage
+-----
+python quantize_reranker.py \
+    --model BAAI/bge-reranker-base \
+    --out_dir data/models/bge-reranker-base-onnx
+"""
+import argparse
+import pathlib
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--model", default="BAAI/bge-reranker-base",
+                    help="Cross-encoder model to export")
+    ap.add_argument("--out_dir", default="data/models/bge-reranker-base-onnx",
+                    help="Directory for the quantized ONNX model")
+    args = ap.parse_args()
+
+    from optimum.onnxruntime import ORTModelForSequenceClassification, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+    out_dir = pathlib.Path(args.out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    print(f"🔄  Exporting {args.model} to ONNX …")
+    model = ORTModelForSequenceClassification.from_pretrained(args.model, export=True)
+    model.save_pretrained(out_dir)
+
+    print("🔄  Applying INT8 dynamic quantization (AVX-512 VNNI) …")
+    quantizer = ORTQuantizer.from_pretrained(out_dir)
+    qconfig = AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+    quantizer.quantize(save_dir=out_dir, quantization_config=qconfig)
+
+    print(f"✅ Quantized reranker saved to {out_dir} "
+          f"(point reranker_model / reranker_model_file at it)")
+
+
+if __name__ == "__main__":
+    main()
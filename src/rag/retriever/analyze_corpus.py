@@ -9,10 +9,13 @@ import logging
 import pathlib
 import pickle
 import re
+import sys
+import numpy as np
 import yaml
 from typing import List, Dict, Any, Tuple
 
-from hybrid_retriever import HybridRetriever
+# Whitespace collapser for display excerpts, compiled once
+_WS = re.compile(r"\s+")
 
 def setup_logging(verbose=False):
     """Configure logging based on verbosity level"""
@@ -23,36 +26,55 @@ def setup_logging(verbose=False):
     )
     return logging.getLogger(__name__)
 
-def find_documents_by_program(retriever: HybridRetriever, program_name: str) -> List[Tuple[object, Dict[str, Any]]]:
-    """Find all documents related to a specific program"""
-    docs = []
-    for doc in retriever.docs:
-        program = doc.metadata.get("program", "").lower()
-        if program_name.lower() in program:
-            docs.append((doc, doc.metadata))
-    return docs
+def build_metadata_arrays(docs) -> Dict[str, np.ndarray]:
+    """
+    Walk the corpus once and keep the filterable metadata fields as
+    parallel lowercased numpy arrays (structure-of-arrays), so each
+    criterion is a single vectorized mask instead of per-doc dict gets.
+    """
+    n = len(docs)
+    return {
+        "program": np.fromiter((doc.metadata.get("program", "").lower() for doc in docs),
+                               dtype=object, count=n),
+        "category": np.fromiter((doc.metadata.get("category", "").lower() for doc in docs),
+                                dtype=object, count=n),
+        "section": np.fromiter((doc.metadata.get("section", "").lower() for doc in docs),
+                               dtype=object, count=n),
+    }
 
-def find_documents_by_criteria(retriever: HybridRetriever, 
-                               program: str = None, 
-                               category: str = None, 
+def build_criteria_mask(arrays: Dict[str, np.ndarray],
+                        program: str = None,
+                        category: str = None,
+                        section: str = None) -> np.ndarray:
+    """Boolean mask over the corpus for the active criteria only.
+
+    Inactive criteria contribute nothing; active ones AND one vectorized
+    mask each (exact match on category, substring on program and
+    section). Kept separate from the document materialization so masks
+    can be combined or reused without building (doc, meta) pairs.
+    """
+    n = len(arrays["program"])
+    mask = np.ones(n, dtype=bool)
+    if category:
+        mask &= arrays["category"] == category.lower()
+    if program:
+        p = program.lower()
+        mask &= np.fromiter((p in x for x in arrays["program"]), bool, n)
+    if section:
+        s = section.lower()
+        mask &= np.fromiter((s in x for x in arrays["section"]), bool, n)
+    return mask
+
+def find_documents_by_criteria(docs, arrays: Dict[str, np.ndarray],
+                               program: str = None,
+                               category: str = None,
                                section: str = None) -> List[Tuple[object, Dict[str, Any]]]:
     """Find all documents matching the provided criteria"""
-    docs = []
-    for doc in retriever.docs:
-        meta = doc.metadata
-        if program and program.lower() not in meta.get("program", "").lower():
-            continue
-        if category and category.lower() != meta.get("category", "").lower():
-            continue
-        if section and section.lower() not in meta.get("section", "").lower():
-            continue
-        docs.append((doc, meta))
-    return docs
+    mask = build_criteria_mask(arrays, program=program, category=category, section=section)
+    return [(docs[i], docs[i].metadata) for i in np.flatnonzero(mask)]
 
 def print_document_summary(docs: List[Tuple[object, Dict[str, Any]]]):
     """Print a summary of the found documents"""
-    print(f"\nFound {len(docs)} matching documents:")
-    
     # Group by category
     by_category = {}
     for doc, meta in docs:
@@ -60,22 +82,30 @@ def print_document_summary(docs: List[Tuple[object, Dict[str, Any]]]):
         if cat not in by_category:
             by_category[cat] = []
         by_category[cat].append((doc, meta))
-    
-    # Print summary by category
+
+    # Assemble the summary and write it once: one syscall instead of a
+    # pair of line-buffered prints per document
+    lines = [f"\nFound {len(docs)} matching documents:"]
     for cat, cat_docs in by_category.items():
-        print(f"\n== Category: {cat} ({len(cat_docs)} documents) ==")
+        lines.append(f"\n== Category: {cat} ({len(cat_docs)} documents) ==")
         for i, (doc, meta) in enumerate(cat_docs, 1):
             program = meta.get("program", "unknown")
             section = meta.get("section", "unknown")
-            # Show truncated content
-            content = re.sub(r'\s+', ' ', doc.page_content).strip()
+            # Show truncated content; slice before the regex so it never
+            # walks more than the excerpt needs
+            content = _WS.sub(' ', doc.page_content[:400]).strip()
             if len(content) > 100:
                 content = content[:97] + "..."
-            print(f"{i}. {program} | {section}\n   {content}")
-            print()
+            lines.append(f"{i}. {program} | {section}\n   {content}")
+            lines.append("")
+    sys.stdout.write("\n".join(lines) + "\n")
 
 def main():
     """Main entry point for the corpus analyzer"""
+    # Deferred: HybridRetriever pulls in torch/faiss (seconds of
+    # startup), which --help and plain module imports should not pay
+    from hybrid_retriever import HybridRetriever
+
     parser = argparse.ArgumentParser(description="Analyze corpus for specific documents")
     parser.add_argument("--config", default="../config/retriever.yaml", help="Path to retriever config")
     parser.add_argument("--program", help="Program name to search for")
@@ -96,10 +126,14 @@ def main():
         logger.info(f"Loading corpus from config: {args.config}")
         retriever = HybridRetriever(args.config)
         logger.info(f"Loaded {len(retriever.docs)} documents in corpus")
-        
+
+        # Build the metadata arrays once, then each criterion is one mask
+        arrays = build_metadata_arrays(retriever.docs)
+
         # Find documents matching criteria
         docs = find_documents_by_criteria(
-            retriever,
+            retriever.docs,
+            arrays,
             program=args.program,
             category=args.category,
             section=args.section
@@ -131,5 +165,4 @@ def main():
         return 1
 
 if __name__ == "__main__":
-    import sys
     sys.exit(main()) 
\ No newline at end of file
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Array-backed BM25 index.
+
+Replaces the pickled rank_bm25 BM25Okapi object graph with flat numpy
+arrays (CSR posting lists over terms): token ids are int32, term
+frequencies and idf are float32, and document lengths are normalized
+against a precomputed avgdl. Each array is persisted as its own .npy
+file and loaded memory-mapped, so startup does no unpickling and the
+kernel page cache shares one copy of the index across processes.
+"""
+
+import json
+import pathlib
+from collections import Counter
+from typing import Dict, List
+
+import numpy as np
+
+try:
+    from numba import njit
+    _HAS_NUMBA = True
+except ImportError:
+    _HAS_NUMBA = False
+
+ARRAY_FIELDS = ("doc_ids", "contrib", "indptr", "idf", "doc_len")
+VOCAB_FILE = "bm25_vocab.json"
+
+# Okapi BM25 parameters (rank_bm25 defaults)
+K1 = 1.5
+B = 0.75
+
+if _HAS_NUMBA:
+    @njit(cache=True, fastmath=True)
+    def _score_kernel(q_tids, doc_ids, contrib, indptr, idf, scores):
+        """Accumulate BM25 contributions for every query term in one pass.
+
+        The document-dependent part of the formula is baked into contrib at
+        index time, so each posting costs a single multiply-add here.
+        """
+        for qi in range(q_tids.shape[0]):
+            t = q_tids[qi]
+            w = idf[t]
+            for p in range(indptr[t], indptr[t + 1]):
+                scores[doc_ids[p]] += w * contrib[p]
+
+    @njit(cache=True, fastmath=True)
+    def _maxscore_topk_kernel(q_tids, doc_ids, contrib, indptr, idf, term_ub, k, scores):
+        """Top-k scoring with MaxScore pruning.
+
+        Terms are processed in descending order of their maximum possible
+        contribution; once the remaining terms' combined upper bound cannot
+        beat the provisional k-th best score, postings of still-unscored
+        documents are skipped. Scores of the surviving top-k stay exact.
+        """
+        nq = q_tids.shape[0]
+        order = np.argsort(-term_ub)
+
+        # suffix[i] = upper bound a yet-unscored doc can still reach from term i on
+        suffix = np.zeros(nq + 1, dtype=np.float32)
+        for i in range(nq - 1, -1, -1):
+            suffix[i] = suffix[i + 1] + term_ub[order[i]]
+
+        # explicit top-k tracker; k is small so linear scans are cheap
+        topk_doc = np.full(k, -1, dtype=np.int64)
+        topk_score = np.zeros(k, dtype=np.float32)
+        n_top = 0
+
+        for i in range(nq):
+            t = q_tids[order[i]]
+            w = idf[t]
+            threshold = np.float32(-1.0)
+            if n_top >= k:
+                threshold = topk_score[0]
+                for j in range(1, k):
+                    if topk_score[j] < threshold:
+                        threshold = topk_score[j]
+            skip_new = n_top >= k and suffix[i] <= threshold
+            for p in range(indptr[t], indptr[t + 1]):
+                d = doc_ids[p]
+                if skip_new and scores[d] == 0.0:
+                    continue
+                s = scores[d] + w * contrib[p]
+                scores[d] = s
+                pos = -1
+                for j in range(n_top):
+                    if topk_doc[j] == d:
+                        pos = j
+                        break
+                if pos >= 0:
+                    topk_score[pos] = s
+                elif n_top < k:
+                    topk_doc[n_top] = d
+                    topk_score[n_top] = s
+                    n_top += 1
+                else:
+                    minpos = 0
+                    for j in range(1, k):
+                        if topk_score[j] < topk_score[minpos]:
+                            minpos = j
+                    if s > topk_score[minpos]:
+                        topk_doc[minpos] = d
+                        topk_score[minpos] = s
+
+
+class BM25Index:
+    """BM25 scoring over CSR posting lists stored as numpy arrays."""
+
+    def __init__(self, vocab: Dict[str, int], doc_ids: np.ndarray, contrib: np.ndarray,
+                 indptr: np.ndarray, idf: np.ndarray, doc_len: np.ndarray, avgdl: float):
+        self.vocab = vocab
+        self.doc_ids = doc_ids        # int32[nnz]   posting doc ids
+        self.contrib = contrib        # float32[nnz] precomputed tf*(k1+1)/(tf+norm_len)
+        self.indptr = indptr          # int64[n_terms+1] CSR row pointers
+        self.idf = idf                # float32[n_terms]
+        self.doc_len = doc_len        # float32[n_docs]
+        self.avgdl = avgdl
+        self.n_docs = len(doc_len)
+        # Per-term score ceiling, used by MaxScore pruning in get_top_k
+        if len(idf):
+            self.max_contrib = (np.asarray(idf)
+                                * np.maximum.reduceat(contrib, indptr[:-1])).astype(np.float32)
+        else:
+            self.max_contrib = np.zeros(0, dtype=np.float32)
+
+    # -------- build / persistence --------
+    @classmethod
+    def build(cls, corpus_tokens: List[List[str]]) -> "BM25Index":
+        """Build the index from pre-tokenized documents."""
+        vocab: Dict[str, int] = {}
+        postings: List[List] = []     # term_id -> [(doc_id, tf), ...]
+        doc_len = np.fromiter((len(toks) for toks in corpus_tokens),
+                              dtype=np.float32, count=len(corpus_tokens))
+
+        for doc_id, toks in enumerate(corpus_tokens):
+            for tok, tf in Counter(toks).items():
+                tid = vocab.setdefault(tok, len(vocab))
+                if tid == len(postings):
+                    postings.append([])
+                postings[tid].append((doc_id, tf))
+
+        n_docs = len(corpus_tokens)
+        nnz = sum(len(p) for p in postings)
+        doc_ids = np.empty(nnz, dtype=np.int32)
+        tfs = np.empty(nnz, dtype=np.float32)
+        indptr = np.zeros(len(vocab) + 1, dtype=np.int64)
+        idf = np.empty(len(vocab), dtype=np.float32)
+
+        pos = 0
+        for tid, plist in enumerate(postings):
+            for doc_id, tf in plist:
+                doc_ids[pos] = doc_id
+                tfs[pos] = tf
+                pos += 1
+            indptr[tid + 1] = pos
+            df = len(plist)
+            idf[tid] = np.log1p((n_docs - df + 0.5) / (df + 0.5))
+
+        avgdl = float(doc_len.mean()) if n_docs else 1.0
+
+        # Precompute the document-dependent factor per posting so query-time
+        # scoring is a single idf[t] * contrib[p] multiply-add, no divisions
+        norm_len = K1 * (1.0 - B + B * doc_len / avgdl)
+        contrib = tfs * (K1 + 1.0) / (tfs + norm_len[doc_ids])
+        return cls(vocab, doc_ids, contrib.astype(np.float32), indptr, idf, doc_len, avgdl)
+
+    def save(self, index_dir) -> None:
+        index_dir = pathlib.Path(index_dir)
+        for name in ARRAY_FIELDS:
+            np.save(index_dir / f"bm25_{name}.npy", getattr(self, name))
+        with open(index_dir / VOCAB_FILE, "w", encoding="utf-8") as f:
+            json.dump({"avgdl": self.avgdl, "vocab": self.vocab}, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, index_dir) -> "BM25Index":
+        """Load the index with posting arrays memory-mapped read-only.
+
+        Multi-worker note: because the arrays are mmapped, every process
+        loading the same index shares one physical copy through the kernel
+        page cache - no shared_memory plumbing needed. Services that fork
+        workers should construct the retriever (and its docstore) before
+        forking so the remaining Python objects are shared copy-on-write.
+        """
+        index_dir = pathlib.Path(index_dir)
+        # mmap_mode keeps the posting arrays on disk; pages are faulted in on
+        # first touch and shared between processes through the page cache
+        arrays = {name: np.load(index_dir / f"bm25_{name}.npy", mmap_mode="r")
+                  for name in ARRAY_FIELDS}
+        with open(index_dir / VOCAB_FILE, encoding="utf-8") as f:
+            sidecar = json.load(f)
+        return cls(sidecar["vocab"], arrays["doc_ids"], arrays["contrib"],
+                   arrays["indptr"], arrays["idf"], arrays["doc_len"],
+                   float(sidecar["avgdl"]))
+
+    # -------- scoring --------
+    def _token_ids(self, tokens: List[str]) -> np.ndarray:
+        """Map query tokens to vocab ids, one dict probe per token.
+
+        A bound .get with filtering beats the membership-test-then-index
+        pattern, which probes the vocab dict twice per token.
+        """
+        get = self.vocab.get
+        return np.fromiter((tid for tid in map(get, tokens) if tid is not None),
+                           dtype=np.int64)
+
+    def warmup(self) -> None:
+        """Trigger numba JIT compilation (or cached-kernel load) eagerly.
+
+        The first call into each njit kernel pays compile/deserialize cost;
+        scoring a dummy token at init keeps that off the first real query.
+        """
+        if _HAS_NUMBA and self.n_docs and self.vocab:
+            tok = next(iter(self.vocab))
+            self.get_scores([tok])
+            self.get_top_k([tok], 1)
+
+    def get_scores(self, tokens: List[str]) -> np.ndarray:
+        """BM25 scores for every document given query tokens."""
+        scores = np.zeros(self.n_docs, dtype=np.float32)
+        q_tids = self._token_ids(tokens)
+        if q_tids.size == 0:
+            return scores
+        if _HAS_NUMBA:
+            _score_kernel(q_tids, self.doc_ids, self.contrib, self.indptr,
+                          self.idf, scores)
+        else:
+            self._score_numpy(q_tids, scores)
+        return scores
+
+    def get_top_k(self, tokens: List[str], k: int):
+        """Top-k document indices (descending) plus the score vector.
+
+        Uses the MaxScore-pruned kernel when numba is available, so postings
+        that cannot lift a document into the top-k are never accumulated.
+        """
+        scores = np.zeros(self.n_docs, dtype=np.float32)
+        q_tids = self._token_ids(tokens)
+        if q_tids.size == 0 or k <= 0 or self.n_docs == 0:
+            return np.empty(0, dtype=np.int64), scores
+        k = min(k, self.n_docs)
+        if _HAS_NUMBA:
+            _maxscore_topk_kernel(q_tids, self.doc_ids, self.contrib, self.indptr,
+                                  self.idf, self.max_contrib[q_tids], k, scores)
+        else:
+            self._score_numpy(q_tids, scores)
+        top = np.argpartition(scores, -k)[-k:]
+        idxs = top[np.argsort(scores[top])[::-1]]
+        return idxs, scores
+
+    def _score_numpy(self, q_tids: np.ndarray, scores: np.ndarray) -> None:
+        """Vectorized fallback used when numba is not installed."""
+        for tid in q_tids:
+            start, end = self.indptr[tid], self.indptr[tid + 1]
+            ids = self.doc_ids[start:end]
+            scores[ids] += self.idf[tid] * self.contrib[start:end]
@@ -7,8 +7,8 @@ import logging
 from pathlib import Path
 import yaml
 
-from query_parser import parse_query
-from hybrid_retriever import HybridRetriever
+# Whitespace collapser for display excerpts, compiled once
+_WS = re.compile(r"\s+")
 
 def setup_logging(verbose=False):
     """Configure logging based on verbosity level"""
@@ -21,8 +21,15 @@ def setup_logging(verbose=False):
 
 def main():
     """Main entry point for the retriever CLI"""
+    # Deferred: the retriever imports pull in torch/faiss (seconds of
+    # startup), which --help and plain module imports should not pay
+    from query_parser import parse_query
+    from hybrid_retriever import HybridRetriever
+
     ap = argparse.ArgumentParser(description="TUM RAG Retriever CLI")
-    ap.add_argument("--query", required=True, help="Query string to search for")
+    ap.add_argument("--query", help="Query string to search for")
+    ap.add_argument("--repl", action="store_true",
+                    help="Interactive mode: load models once, then read queries from stdin")
     ap.add_argument("--config", default="src/rag/config/retriever.yaml", help="Path to retriever config")
     ap.add_argument("--output", "-o", help="Output results to file (JSON format)")
     ap.add_argument("--limit", "-n", type=int, help="Limit number of results")
@@ -32,51 +39,51 @@ def main():
     ap.add_argument("--exact-match", action="store_true", help="Only return exact program matches")
     args = ap.parse_args()
 
+    if not args.query and not args.repl:
+        ap.error("--query is required unless --repl is set")
+
     logger = setup_logging(args.verbose)
-    
-    try:
-        # Initialize retriever
-        logger.debug(f"Initializing retriever with config: {args.config}")
-        retr = HybridRetriever(args.config)
-        
+
+    def run_query(retr, query):
+        """Retrieve and display results for one query on a loaded retriever"""
         # Parse query to extract filters
-        filters = parse_query(args.query)
-        logger.debug(f"Parsed query '{args.query}' to filters: {filters}")
-        
+        filters = parse_query(query)
+        logger.debug(f"Parsed query '{query}' to filters: {filters}")
+
         # If no-filter flag is set, clear the filters
         if args.no_filter:
             logger.info("Filters disabled by --no-filter flag")
             filters = {"slug": "", "degree": "", "category": ""}
-        
+
         # Retrieve results
-        results = retr.retrieve(args.query, filters)
-        
+        results = retr.retrieve(query, filters)
+
         # Apply exact match filtering if requested
         if args.exact_match and filters.get("slug") and results:
             logger.info("Filtering for exact program matches only")
             exact_matches = []
             slug = filters["slug"].lower().replace('-', ' ')
-            
+
             for score, (doc, base) in results:
                 program = doc.metadata.get("program", "").lower()
                 if slug == program or slug in program:
                     exact_matches.append((score, (doc, base)))
-            
+
             if exact_matches:
                 results = exact_matches
                 logger.info(f"Found {len(results)} exact matches for '{slug}'")
             else:
                 logger.warning(f"No exact matches found for '{slug}'. Showing all results.")
-        
+
         # Limit results if requested
         if args.limit and 0 < args.limit < len(results):
             results = results[:args.limit]
-        
+
         # Format and display/save results
         if args.output:
             # Save to file
             output_data = {
-                "query": args.query,
+                "query": query,
                 "filters": filters,
                 "results": [
                     {
@@ -91,11 +98,11 @@ def main():
             with open(args.output, 'w', encoding='utf-8') as f:
                 json.dump(output_data, f, indent=2, ensure_ascii=False)
             logger.info(f"Results saved to {args.output}")
-        
+
         # Print results to console
         extracted_info = f"Program: {filters.get('slug', 'None')} | Degree: {filters.get('degree', 'None')} | Category: {filters.get('category', 'None')}"
-        print(f"\nQuery: {args.query}\nExtracted: {extracted_info}\n" + "="*80)
-        
+        print(f"\nQuery: {query}\nExtracted: {extracted_info}\n" + "="*80)
+
         if not results:
             print("\n⚠️  No results found for this query with the current filters.")
             print("Try one of the following:")
@@ -103,43 +110,68 @@ def main():
             print("  - Use the --no-filter flag to disable filtering")
             print("  - Check if the program name is correct")
             print("="*80)
-            return 0
-            
+            return
+
         if args.raw:
             print(json.dumps(results, indent=2))
         else:
+            # Assemble the whole listing and write it once: one syscall
+            # instead of several line-buffered prints per result
+            lines = []
             for rk, (score, (doc, base)) in enumerate(results, 1):
                 m = doc.metadata
                 program = m.get("program", "")
                 category = m.get("category", "")
                 section = m.get("section", "")
-                
+
                 # Highlight if program matches query
                 if filters.get("slug") and filters["slug"].replace("-", " ") in program.lower():
                     program_display = f"✓ {program}"
                 else:
                     program_display = f"× {program}"
-                
+
                 # Highlight if category matches query
                 if filters.get("category") and (
-                    filters["category"].lower() == category.lower() or 
+                    filters["category"].lower() == category.lower() or
                     filters["category"].lower() in section.lower()):
                     category_display = f"✓ {category}"
                 else:
                     category_display = f"× {category}"
-                
-                print(f"\n#{rk}  Score: {score:.3f}  Base: {base:.3f}")
-                print(f"Program: {program_display} | Category: {category_display} | Section: {section}")
-                
-                # Clean and truncate content for display
-                content = re.sub(r'\s+', ' ', doc.page_content).strip()
+
+                lines.append(f"\n#{rk}  Score: {score:.3f}  Base: {base:.3f}")
+                lines.append(f"Program: {program_display} | Category: {category_display} | Section: {section}")
+
+                # Clean and truncate content for display; slice before the
+                # regex so it never walks more than the excerpt needs
+                content = _WS.sub(' ', doc.page_content[:800]).strip()
                 if len(content) > 320:
                     content = content[:320] + "…"
-                print(content)
-                print("-"*80)
-                
+                lines.append(content)
+                lines.append("-"*80)
+            sys.stdout.write("\n".join(lines) + "\n")
+
+    try:
+        # Initialize retriever
+        logger.debug(f"Initializing retriever with config: {args.config}")
+        retr = HybridRetriever(args.config)
+
+        if args.repl:
+            # Model load dominates single-shot invocations; keep the loaded
+            # retriever alive and amortize it across the whole session
+            print("REPL mode — type a query, empty line or Ctrl-D to exit")
+            while True:
+                try:
+                    q = input("> ").strip()
+                except EOFError:
+                    break
+                if not q:
+                    break
+                run_query(retr, q)
+        else:
+            run_query(retr, args.query)
+
         return 0
-        
+
     except FileNotFoundError as e:
         logger.error(f"File not found: {e}")
         return 1
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Persistent on-disk cache for query embeddings.
+
+Backs the retrievers' in-memory LRU with a sqlite table keyed by
+(model, sha256(text)), so queries repeated across process restarts or
+test runs never reach the embedding API. WAL journal mode keeps
+concurrent readers cheap when several workers share one cache file.
+"""
+
+import hashlib
+import logging
+import sqlite3
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    model TEXT NOT NULL,
+    hash  TEXT NOT NULL,
+    vec   BLOB NOT NULL,
+    PRIMARY KEY (model, hash)
+)
+"""
+
+
+class PersistentEmbedCache:
+    """sqlite-backed (model, sha256(text)) -> float32 vector cache."""
+
+    _LOG_EVERY = 100
+
+    def __init__(self, path, model: str):
+        self.model = model
+        # check_same_thread off: lookups can come from the search pool
+        self.conn = sqlite3.connect(str(path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(_SCHEMA)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(text: str) -> str:
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    def get(self, text: str):
+        """Return the cached float32 vector for text, or None on miss."""
+        row = self.conn.execute(
+            "SELECT vec FROM embeddings WHERE model=? AND hash=?",
+            (self.model, self._key(text))).fetchone()
+        if row is None:
+            self.misses += 1
+            self._log_rate()
+            return None
+        self.hits += 1
+        self._log_rate()
+        return np.frombuffer(row[0], dtype=np.float32).copy()
+
+    def put(self, text: str, vec) -> None:
+        self.conn.execute(
+            "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?)",
+            (self.model, self._key(text),
+             np.asarray(vec, dtype=np.float32).tobytes()))
+        self.conn.commit()
+
+    def _log_rate(self) -> None:
+        total = self.hits + self.misses
+        if total % self._LOG_EVERY == 0:
+            logger.debug("Embed cache hit rate: %.1f%% over %d lookups",
+                         100.0 * self.hits / total, total)
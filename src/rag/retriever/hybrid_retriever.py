@@ -1,24 +1,35 @@
-import pickle, re, pathlib, yaml, logging, os
+import hashlib, pickle, re, pathlib, threading, yaml, logging, os
+import numpy as np
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Tuple, Dict, Optional
-from rank_bm25 import BM25Okapi
 from sentence_transformers import CrossEncoder
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from langchain_community.vectorstores import FAISS
+from bm25_index import BM25Index
+from embed_cache import PersistentEmbedCache
 from dotenv import load_dotenv
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Precompiled tokenizer patterns; the ASCII variant skips the slower
+# Unicode \w machinery for the common all-ASCII query
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_ASCII_TOKEN_RE = re.compile(r"[a-z0-9_]+")
+
+# Shared worker pool for overlapping dense and sparse retrieval; module-level
+# so threads are created once, not per query
+_SEARCH_POOL = ThreadPoolExecutor(max_workers=2)
+
 class HybridRetriever:
-    def __init__(self, cfg_path: str = "../config/retriever.yaml"):
+    def __init__(self, cfg_path: str = "../config/retriever.yaml",
+                 reranker: Optional[CrossEncoder] = None):
         try:
             # Load environment variables
             load_dotenv()
-            api_key = os.getenv("GOOGLE_API_KEY")
-            if not api_key:
-                raise ValueError("GOOGLE_API_KEY environment variable is required")
-            
+
             # Get project root directory (parent of src)
             root_dir = pathlib.Path(__file__).parent.parent.parent.parent
             # Load configuration
@@ -27,229 +38,663 @@ class HybridRetriever:
             index_dir = root_dir / "data" / "embeddings"
             cfg["index_dir"] = str(index_dir)
             self.cfg = cfg
-            
-            # dense vectordb
-            self.emb = GoogleGenerativeAIEmbeddings(model=cfg["embed_model"], google_api_key=api_key)
-            self.vdb = FAISS.load_local(cfg["index_dir"], self.emb,
-                                        allow_dangerous_deserialization=True)
+
+            # dense vectordb - embed either via the remote Google API or a
+            # local sentence-transformers model (no network round-trip per
+            # query; the index must be built with the same model)
+            if cfg.get("embed_backend", "google") == "local":
+                from langchain_community.embeddings import HuggingFaceEmbeddings
+                self.emb = HuggingFaceEmbeddings(
+                    model_name=cfg.get("local_embed_model", "BAAI/bge-small-en-v1.5"),
+                    encode_kwargs={"normalize_embeddings": True})
+            else:
+                api_key = os.getenv("GOOGLE_API_KEY")
+                if not api_key:
+                    raise ValueError("GOOGLE_API_KEY environment variable is required")
+                self.emb = GoogleGenerativeAIEmbeddings(model=cfg["embed_model"], google_api_key=api_key)
+            self.vdb = self._load_vectordb(cfg["index_dir"])
+            # Fail fast if the embedding model and the index disagree on
+            # dimensionality (e.g. a 384-d local model over the 768-d Google
+            # index): otherwise every search raises per query and retrieve's
+            # broad except turns that into silent empty results
+            probe_dim = len(self.emb.embed_query("dimension probe"))
+            if probe_dim != self.vdb.index.d:
+                raise ValueError(
+                    f"Embedding model yields {probe_dim}-d vectors but the index "
+                    f"at {cfg['index_dir']} stores {self.vdb.index.d}-d - rebuild "
+                    f"it with vectorize.py using the same backend/model")
+            # Flat scans are BLAS-tiled and scale across cores; faiss
+            # defaults are conservative in some builds, so pin explicitly
+            import faiss
+            faiss.omp_set_num_threads(os.cpu_count() or 1)
+            # ANN indexes built by build_ann_index.py expose query-time
+            # recall/speed knobs; both checks are no-ops on a flat index
+            if hasattr(self.vdb.index, "hnsw"):
+                self.vdb.index.hnsw.efSearch = cfg.get("efSearch", 64)
+            if hasattr(self.vdb.index, "nprobe") and cfg.get("nprobe"):
+                self.vdb.index.nprobe = cfg["nprobe"]
+            # Indexes built with vectorize.py --normalize use inner product
+            # over unit vectors: scores are cosine already, no 1 - distance
+            self._dense_ip = (getattr(self.vdb.index, "metric_type", faiss.METRIC_L2)
+                              == faiss.METRIC_INNER_PRODUCT)
             # bm25
             try:
                 with open(pathlib.Path(cfg["index_dir"]) / "bm25.pkl", "rb") as f:
                     pack = pickle.load(f)
-                self.bm25: BM25Okapi = pack["bm25"]
-                self.docs             = pack["docs"]
-            except FileNotFoundError:
-                logger.error(f"BM25 index file not found at {cfg['index_dir']}/bm25.pkl")
+                self.docs = pack["docs"]
+                self.bm25 = BM25Index.load(cfg["index_dir"])
+                self.bm25.warmup()      # JIT-compile the scoring kernels now
+            except (FileNotFoundError, KeyError):
+                logger.error(f"BM25 index not found or outdated at {cfg['index_dir']} - "
+                             f"re-run src/rag/build_bm25.py")
                 raise
-            # reranker
-            self.rerank = CrossEncoder(cfg["reranker_model"])
+            # Precompute per-doc feature flags: which known category names appear
+            # in the page content. Scanning each doc once here means the filter
+            # step never has to rescan full page text per candidate per query.
+            # Alongside, keep the metadata fields the filter reads as parallel
+            # lowercased structure-of-arrays lists, so filtering never calls
+            # str.lower() (or even touches doc.metadata) per candidate per query.
+            self._meta_slug_lc: List[str] = []
+            self._meta_program_lc: List[str] = []
+            self._meta_category_lc: List[str] = []
+            self._meta_section_lc: List[str] = []
+            self._meta_present = np.empty(len(self.docs), dtype=bool)
+            self._doc_keys = np.empty(len(self.docs), dtype=object)
+            self._id_to_idx: Dict[object, int] = {}
+            for i, doc in enumerate(self.docs):
+                text_lc = doc.page_content.lower() if doc.page_content else ""
+                doc._content_cats = frozenset(
+                    c for c in ("apply", "keydata", "info") if c in text_lc
+                )
+                meta = doc.metadata or {}
+                self._meta_slug_lc.append(meta.get("slug", "").lower())
+                self._meta_program_lc.append(meta.get("program", "").lower())
+                self._meta_category_lc.append(meta.get("category", "").lower())
+                self._meta_section_lc.append(meta.get("section", "").lower())
+                self._meta_present[i] = bool(doc.metadata)
+                # Stable per-row key, computed once: query-time joins index
+                # this array instead of re-deriving the key per candidate
+                self._doc_keys[i] = meta.get("id") or id(doc)
+                self._id_to_idx[self._doc_keys[i]] = i
+                # Remember the row so per-doc code paths can read the
+                # lowercased arrays instead of re-lowering metadata strings
+                doc._row = i
+
+            # Application-intent queries used to rescan every document; group
+            # rows by program once and precompute the (query-independent)
+            # filtered + sorted application-doc list per program
+            self._program_to_doc_idxs: Dict[str, List[int]] = {}
+            for i, prog in enumerate(self._meta_program_lc):
+                self._program_to_doc_idxs.setdefault(prog, []).append(i)
+            self._apply_docs_by_program: Dict[str, List[object]] = {}
+            for prog, idxs in self._program_to_doc_idxs.items():
+                apply_docs = self._collect_application_docs(idxs)
+                if apply_docs:
+                    self._apply_docs_by_program[prog] = apply_docs
+
+            # reranker - prefer GPU with fp16 when one is available.
+            # An injected instance (e.g. shared between several retrievers
+            # in a test harness) skips the multi-second model load entirely.
+            if reranker is not None:
+                self.rerank = reranker
+                logger.info("Reusing injected reranker instance")
+            else:
+                import torch
+                device = cfg.get("reranker_device") or ("cuda" if torch.cuda.is_available() else "cpu")
+                backend = cfg.get("reranker_backend", "torch")
+                ce_kwargs = {"device": device,
+                             "max_length": cfg.get("reranker_max_length", 256),
+                             # Rust tokenizer: much faster pre-tokenization
+                             # and it releases the GIL during batching
+                             "tokenizer_args": {"use_fast": True}}
+                if backend == "onnx":
+                    # INT8 models exported by src/rag/quantize_reranker.py are
+                    # picked up via reranker_model_file. Tune the ORT session:
+                    # all cores for intra-op parallelism and full graph
+                    # optimization (QKV/LayerNorm fusion) before the first run.
+                    import onnxruntime as ort
+                    so = ort.SessionOptions()
+                    so.intra_op_num_threads = os.cpu_count() or 1
+                    so.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+                    provider = "CUDAExecutionProvider" if device == "cuda" else "CPUExecutionProvider"
+                    ce_kwargs["backend"] = "onnx"
+                    ce_kwargs["model_kwargs"] = {"provider": provider,
+                                                 "session_options": so}
+                    if cfg.get("reranker_model_file"):
+                        ce_kwargs["model_kwargs"]["file_name"] = cfg["reranker_model_file"]
+                self.rerank = CrossEncoder(cfg["reranker_model"], **ce_kwargs)
+                if device == "cuda" and backend == "torch":
+                    self.rerank.model.half()
+                logger.info(f"Reranker running on {device}")
+            # Predict calls must be serialized: the fast tokenizer mutates
+            # per-call padding/truncation state and raises "Already borrowed"
+            # when two threads hit it at once (two retrievers sharing one
+            # injected instance, or the warmup future racing the first
+            # query). The lock lives on the CrossEncoder so every sharer
+            # serializes against the same one.
+            lock = getattr(self.rerank, "_predict_lock", None)
+            if lock is None:
+                lock = threading.Lock()
+                self.rerank._predict_lock = lock
+            self._rerank_lock = lock
+            self._ce_batch_size = None          # autotuned on first predict
+            self._ce_cache = OrderedDict()      # (query_hash, doc_id) -> score
+            self._embed_cache = OrderedDict()   # query_hash -> float32 vector
+            # Disk-backed second level keyed by (model, sha256(text)) - hits
+            # survive restarts and are shared across processes and test runs
+            self._disk_embed_cache = None
+            if cfg.get("embed_cache", True):
+                # Key by the model actually embedding queries, so switching
+                # embed_backend never serves vectors from the other model
+                if cfg.get("embed_backend", "google") == "local":
+                    cache_model = cfg.get("local_embed_model", "BAAI/bge-small-en-v1.5")
+                else:
+                    cache_model = cfg["embed_model"]
+                try:
+                    self._disk_embed_cache = PersistentEmbedCache(
+                        pathlib.Path(cfg["index_dir"]) / "embed_cache.sqlite",
+                        cache_model)
+                except Exception as e:
+                    logger.warning(f"Persistent embed cache disabled: {str(e)}")
+            if cfg.get("compile_reranker", False) and reranker is None:
+                self._compile_reranker()
+            # Warm the reranker in the background: the first predict pays
+            # one-time graph build / kernel compile cost far above steady
+            # state, so hide it behind init instead of the first real query
+            self._warmup_future = _SEARCH_POOL.submit(self._warm_reranker)
         except Exception as e:
             logger.error(f"Error initializing HybridRetriever: {str(e)}")
             raise
 
+    def _warm_reranker(self) -> None:
+        """One throwaway predict under the shared lock (background warmup)."""
+        with self._rerank_lock:
+            self.rerank.predict([("warmup", "warmup")], batch_size=1)
+
     # -------- helpers --------
+    def _load_vectordb(self, index_dir: str) -> FAISS:
+        """Load the FAISS store with the index memory-mapped read-only.
+
+        FAISS.load_local reads the whole index into per-process RAM; mapping
+        it instead lets multiple workers share one copy through the page
+        cache. Falls back to the regular loader for index types that do not
+        support mmap.
+        """
+        try:
+            import faiss
+            path = pathlib.Path(index_dir)
+            index = faiss.read_index(str(path / "index.faiss"),
+                                     faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+            with open(path / "index.pkl", "rb") as f:
+                docstore, index_to_docstore_id = pickle.load(f)
+            return FAISS(embedding_function=self.emb, index=index,
+                         docstore=docstore, index_to_docstore_id=index_to_docstore_id)
+        except Exception as e:
+            logger.warning(f"mmap load of FAISS index failed ({str(e)}), falling back to load_local")
+            return FAISS.load_local(index_dir, self.emb,
+                                    allow_dangerous_deserialization=True)
+
+    def _compile_reranker(self):
+        """Compile the cross-encoder forward pass with torch.compile.
+
+        Every batch is padded to the fixed reranker_max_length so the compiled
+        graph only ever sees one input shape and is never re-traced.
+        """
+        try:
+            import torch
+            if not hasattr(torch, "compile"):
+                logger.warning("torch.compile not available, skipping reranker compilation")
+                return
+            tokenizer = self.rerank.tokenizer
+            self.rerank.tokenizer = (
+                lambda *args, **kwargs: tokenizer(*args, **{**kwargs, "padding": "max_length"})
+            )
+            self.rerank.model = torch.compile(self.rerank.model, mode="reduce-overhead")
+            logger.info("Reranker compiled with torch.compile (reduce-overhead)")
+        except Exception as e:
+            logger.warning(f"Could not compile reranker: {str(e)}")
+
     @staticmethod
     def _tokenize(text: str) -> List[str]:
-        return re.findall(r"\w+", text.lower())
+        text = text.lower()
+        if text.isascii():
+            return _ASCII_TOKEN_RE.findall(text)
+        return _TOKEN_RE.findall(text)
+
+    _EMBED_CACHE_SIZE = 4096
+
+    def _embed_query(self, query: str) -> np.ndarray:
+        """Query embedding with an LRU cache keyed by text hash.
+
+        Repeated queries (evaluation sweeps, UI retries) skip the embedding
+        RPC entirely; the cached vector is already contiguous float32.
+        """
+        key = hashlib.blake2b(query.encode(), digest_size=16).digest()
+        vec = self._embed_cache.get(key)
+        if vec is None:
+            if self._disk_embed_cache is not None:
+                vec = self._disk_embed_cache.get(query)
+            if vec is None:
+                vec = np.ascontiguousarray(self.emb.embed_query(query), dtype=np.float32)
+                if self._disk_embed_cache is not None:
+                    self._disk_embed_cache.put(query, vec)
+            if self._dense_ip:
+                # unit-norm the query so IP search returns cosine
+                norm = float(np.linalg.norm(vec))
+                if norm:
+                    vec = vec / norm
+            self._embed_cache[key] = vec
+            if len(self._embed_cache) > self._EMBED_CACHE_SIZE:
+                self._embed_cache.popitem(last=False)
+        else:
+            self._embed_cache.move_to_end(key)
+        return vec
+
+    _CE_CACHE_SIZE = 50_000
+    _CE_CHAR_CAP = 1200     # ~256 BPE tokens; matches reranker_max_length
+
+    def _ce_predict_cached(self, query: str, docs: List[object]) -> np.ndarray:
+        """Cross-encoder scores with an LRU cache keyed by (query hash, doc id).
+
+        Repeated query+doc pairs (popular queries, overlapping filter sets)
+        skip the transformer forward entirely; only misses hit the model.
+        """
+        q_hash = hashlib.blake2b(query.encode(), digest_size=8).digest()
+        keys = [(q_hash, self._doc_keys[doc._row]) for doc in docs]
+        scores = np.empty(len(docs), dtype=np.float32)
+        misses = []
+        for i, key in enumerate(keys):
+            cached = self._ce_cache.get(key)
+            if cached is None:
+                misses.append(i)
+            else:
+                self._ce_cache.move_to_end(key)
+                scores[i] = cached
+        if misses:
+            # Char-cap passages before tokenization: the model truncates to
+            # reranker_max_length anyway, so tokenizing the full text past
+            # ~256 BPE tokens (~1200 chars) is pure waste
+            logits = self._ce_predict(
+                [(query, docs[i].page_content[:self._CE_CHAR_CAP]) for i in misses])
+            for j, i in enumerate(misses):
+                scores[i] = logits[j]
+                self._ce_cache[keys[i]] = float(logits[j])
+            while len(self._ce_cache) > self._CE_CACHE_SIZE:
+                self._ce_cache.popitem(last=False)
+        return scores
+
+    def _ce_predict(self, pairs):
+        """Cross-encoder predict with length-bucketed batching.
+
+        Pairs are sorted by passage length before prediction so each batch
+        pads to similar sequence lengths instead of the longest passage in
+        an arbitrary mix; scores are scattered back to the original order.
+
+        Accepts any iterable of (query, passage) tuples; materialized once
+        here because the length sort has to see every pair.
+        """
+        pairs = list(pairs)
+        order = sorted(range(len(pairs)), key=lambda i: len(pairs[i][1]))
+        logits = self._ce_predict_autotuned([pairs[i] for i in order])
+        unshuffled = np.empty(len(pairs), dtype=np.float32)
+        for j, i in enumerate(order):
+            unshuffled[i] = logits[j]
+        return unshuffled
+
+    def _amp_ctx(self):
+        """Autocast context for reranker forwards, or a no-op.
+
+        Gated by reranker_amp and only meaningful for the torch backend:
+        fp16 autocast on CUDA, bfloat16 on CPU (fast on AVX-512 BF16 /
+        AMX hardware, a slowdown on older cores - hence opt-in).
+        """
+        import contextlib
+        if (not self.cfg.get("reranker_amp", False)
+                or self.cfg.get("reranker_backend", "torch") != "torch"):
+            return contextlib.nullcontext()
+        import torch
+        if torch.cuda.is_available():
+            return torch.autocast("cuda", dtype=torch.float16)
+        return torch.autocast("cpu", dtype=torch.bfloat16)
+
+    def _ce_predict_autotuned(self, pairs):
+        """Cross-encoder predict with a one-shot batch-size autotune.
+
+        Probes large batch sizes first and backs off on CUDA OOM; the
+        winning batch size is cached for all later calls.
+        """
+        with self._rerank_lock, self._amp_ctx():
+            if self._ce_batch_size is not None:
+                return self.rerank.predict(pairs, batch_size=self._ce_batch_size,
+                                           convert_to_numpy=True)
+            for bs in (64, 32, 16):
+                try:
+                    logits = self.rerank.predict(pairs, batch_size=bs, convert_to_numpy=True)
+                    self._ce_batch_size = bs
+                    return logits
+                except RuntimeError as e:
+                    if "out of memory" not in str(e).lower():
+                        raise
+                    logger.warning(f"Reranker OOM at batch size {bs}, retrying smaller")
+                    import torch
+                    torch.cuda.empty_cache()
+            self._ce_batch_size = 8
+            return self.rerank.predict(pairs, batch_size=8, convert_to_numpy=True)
+
+    def _merge_dense_sparse(self, query: str,
+                            dense_hit: Optional[Tuple[np.ndarray, np.ndarray]] = None
+                            ) -> Tuple[Dict[str, Tuple[object, float]], bool]:
+        """
+        Run dense + sparse retrieval and fuse them in a single numpy pass.
+
+        Both branches are kept as full score vectors over the corpus, combined
+        with np.maximum, and Documents are only materialized for the surviving
+        candidates - instead of building two intermediate Python lists and
+        merging them in a dict loop. dense_hit optionally carries a
+        (distances, indices) row precomputed by retrieve_batch.
+
+        Returns the merged candidates plus whether dense and sparse agree on
+        the top-1 document (used for the rerank early-exit).
+        """
+        n_dense = self.cfg["n_dense"]
+        n_sparse = self.cfg["n_sparse"]
+
+        # Dense: query the FAISS index directly so scores stay in numpy.
+        # FAISS requires C-contiguous float32 and silently copies otherwise.
+        def dense_branch():
+            # reshape is a zero-copy view over the cached contiguous
+            # vector, so a repeated query allocates nothing here
+            q_vec = self._embed_query(query).reshape(1, -1)
+            return self.vdb.index.search(q_vec, n_dense)
+
+        # The two branches share no state and spend their time in native code
+        # (embedding API / FAISS / BM25 kernel) that releases the GIL, so run
+        # dense on the pool while sparse scores on this thread
+        f_dense = _SEARCH_POOL.submit(dense_branch) if dense_hit is None else None
+
+        # Sparse: score the whole corpus once, keep only the top n_sparse
+        scores = self.bm25.get_scores(self._tokenize(query))
+        scores = np.asarray(scores, dtype=np.float32)
+
+        if f_dense is not None:
+            distances, indices = f_dense.result()
+            dense_hit = (distances[0], indices[0])
+        d_row, i_row = dense_hit
+        # -inf marks "not a candidate": a dense hit with similarity <= 0
+        # (routine with squared L2 distances) must stay in the rerank pool,
+        # so absence cannot be encoded as 0
+        combined = np.full(len(self.docs), -np.inf, dtype=np.float32)
+        hits = i_row[i_row != -1]
+        if self._dense_ip:
+            combined[hits] = d_row[: len(hits)]     # IP index: already cosine
+        else:
+            combined[hits] = 1.0 - d_row[: len(hits)]   # Distance → Similarity 0-1
 
-    def _bm25_search(self, query: str, k: int) -> List[Tuple[object, float]]:
-        tok = self._tokenize(query)
-        scores = self.bm25.get_scores(tok)
-        idxs = scores.argsort()[-k:][::-1]
         mx = scores.max() or 1
-        return [(self.docs[i], scores[i] / mx) for i in idxs]
+        if n_sparse < scores.size:
+            sparse_top = np.argpartition(scores, -n_sparse)[-n_sparse:]
+        else:
+            sparse_top = np.arange(scores.size)
+        sparse_vec = np.full_like(combined, -np.inf)
+        sparse_vec[sparse_top] = scores[sparse_top] / mx
+
+        # Merge taking maximum score
+        np.maximum(combined, sparse_vec, out=combined)
+
+        # Do dense and sparse agree on the top-1 document?
+        top_agree = (len(hits) > 0 and scores.max() > 0
+                     and hits[0] == int(scores.argmax()))
+
+        # Materialize Documents only for the surviving candidates
+        merged = {self._doc_keys[i]: (self.docs[i], float(combined[i]))
+                  for i in np.flatnonzero(combined > -np.inf)}
+        return merged, top_agree
 
     # -------- main entry --------
-    def retrieve(self, query: str, filters: Dict[str, str]) -> List[Tuple[float, Tuple[object, float]]]:
+    def retrieve(self, query: str, filters: Dict[str, str],
+                 _dense_hit: Optional[Tuple[np.ndarray, np.ndarray]] = None
+                 ) -> List[Tuple[float, Tuple[object, float]]]:
         """
         Hybrid retrieval: Dense + BM25 → Filter → Cross-Encoder reranking
-        
+
         Args:
             query: User query text
             filters: Dictionary of filters extracted from query
-            
+            _dense_hit: Precomputed (distances, indices) row from retrieve_batch
+
         Returns:
             List[Tuple[ce_score, (Document, base_score)]]: Reranked documents with scores
         """
         try:
+            # Block on the background reranker warmup only if it has not
+            # finished yet (first call right after init)
+            if self._warmup_future is not None:
+                try:
+                    self._warmup_future.result()
+                except Exception as e:
+                    logger.warning(f"Reranker warmup failed: {str(e)}")
+                self._warmup_future = None
+
+            # Lowercase the query and filter values once; every downstream
+            # step reads these locals instead of re-calling .lower()
+            q_lc = query.lower()
+            slug_lc = filters.get("slug", "").lower()
+            cat_lc = filters.get("category", "").lower()
+            slug_spaced = slug_lc.replace("-", " ")
+            cat_set = (frozenset(c.strip() for c in cat_lc.split(","))
+                       if cat_lc else None)
+
             # Check if this is an application-related query with a specific program
-            is_apply_query = ("apply" in query.lower() or 
-                              "application" in query.lower() or 
-                              "admission" in query.lower() or
-                              "how to" in query.lower())
-            
-            program_name = filters.get("slug", "").replace("-", " ")
-            
+            is_apply_query = ("apply" in q_lc or
+                              "application" in q_lc or
+                              "admission" in q_lc or
+                              "how to" in q_lc)
+
             # Special case search for program application documents
-            if is_apply_query and program_name:
-                logger.info(f"Special case: Application query detected for program: {program_name}")
+            if is_apply_query and slug_spaced:
+                logger.debug("Special case: application query detected for program: %s", slug_spaced)
                 # First try to find direct application documents for the program
-                application_docs = self._find_program_application_docs(program_name)
-                
+                application_docs = self._find_program_application_docs(slug_spaced)
+
                 if application_docs:
-                    logger.info(f"Found {len(application_docs)} application documents for {program_name}")
+                    logger.debug("Found %d application documents for %s", len(application_docs), slug_spaced)
                     # Map to format [(score, (doc, base_score)), ...]
                     results = [(1.0, (doc, 1.0)) for doc in application_docs]
                     # Limit to top_k
                     top_k = self.cfg.get("top_k", 8)
                     return results[:top_k]
                 else:
-                    logger.info(f"No specific application documents found for {program_name}, continuing with regular search")
-            
+                    logger.debug("No specific application documents found for %s, continuing with regular search", slug_spaced)
+
             # Add program name to query if extracted but not in query
             enhanced_query = query
-            if filters.get("slug") and filters["slug"].replace("-", " ") not in query.lower():
-                enhanced_query = f"{query} {filters['slug'].replace('-', ' ')}"
-                logger.info(f"Enhanced query: '{enhanced_query}'")
+            if slug_spaced and slug_spaced not in q_lc:
+                enhanced_query = f"{query} {slug_spaced}"
+                logger.debug("Enhanced query: '%s'", enhanced_query)
             
-            # 1) Dense retrieval
-            dense = self.vdb.similarity_search_with_score(enhanced_query, k=self.cfg["n_dense"])
-            dense = [(d, 1 - s) for d, s in dense]           # Distance → Similarity 0-1
-
-            # 2) Sparse retrieval
-            sparse = self._bm25_search(enhanced_query, self.cfg["n_sparse"])
-
-            # 3) Merge taking maximum score
-            merged: Dict[str, Tuple[object, float]] = {}
-            for doc, score in dense + sparse:
-                key = doc.metadata.get("id") or id(doc)      # Prefer id; otherwise object address
-                if key not in merged or score > merged[key][1]:
-                    merged[key] = (doc, score)
+            # 1-3) Dense + sparse retrieval fused into a single scoring pass
+            merged, top_agree = self._merge_dense_sparse(enhanced_query, _dense_hit)
 
             # ---------- DEBUG ----------
-            logger.info(f"—— DEBUG ——\ndense raw: {len(dense)}  sparse raw: {len(sparse)}")
-            logger.info(f"merged raw: {len(merged)}")
+            logger.debug("merged raw: %d", len(merged))
+
+            # Cheap early-exit: when dense and sparse agree on the top-1
+            # candidate with a clear margin over #2, reranking will not
+            # change the outcome - skip the cross-encoder entirely
+            if top_agree and len(merged) >= 2:
+                ranked = sorted(merged.values(), key=lambda x: x[1], reverse=True)
+                margin = ranked[0][1] - ranked[1][1]
+                if margin > self.cfg.get("skip_rerank_margin", 0.25):
+                    top_k = self.cfg.get("top_k", 8)
+                    logger.debug("Dense/sparse top-1 agreement with margin %.3f, skipping rerank", margin)
+                    return [(score, (doc, score)) for doc, score in ranked[:top_k]]
 
             # 4) Filter and boost exact matches
-            filtered_boosted = self._apply_filters_with_boosting(merged, filters)
+            filtered_boosted = self._apply_filters_with_boosting(merged, slug_spaced, cat_set)
             if not filtered_boosted:
                 logger.warning("After filter: 0 - no candidate left")
                 return []
 
-            # Log top results before reranking
-            if filtered_boosted:
+            # Log top results before reranking (metadata lookups only when enabled)
+            if filtered_boosted and logger.isEnabledFor(logging.DEBUG):
                 top_doc = filtered_boosted[0][0]
-                logger.info(f"After filter: {len(filtered_boosted)}, first: {top_doc.metadata.get('program', 'unknown')} | {top_doc.metadata.get('category', '-')} | {top_doc.metadata.get('section', '-')}")
+                logger.debug("After filter: %d, first: %s | %s | %s",
+                             len(filtered_boosted), top_doc.metadata.get('program', 'unknown'),
+                             top_doc.metadata.get('category', '-'), top_doc.metadata.get('section', '-'))
 
             # 5) Cross-Encoder reranking with exact match prioritization
-            return self._rerank_with_exact_priority(query, filtered_boosted, filters)
+            return self._rerank_with_exact_priority(query, filtered_boosted, slug_spaced, cat_lc)
             
         except Exception as e:
             logger.error(f"Error in retrieve: {str(e)}")
             return []
 
-    def _apply_filters_with_boosting(self, merged_results: Dict[str, Tuple[object, float]], 
-                      filters: Dict[str, str]) -> List[Tuple[object, float]]:
-        """Apply filters to the merged results and boost exact matches"""
-        
-        def ok(meta, boost_factor=1.0):
-            # If no metadata, skip filter check
-            if not meta:
-                return False, 1.0
-                
-            # Get the program/slug from metadata for matching
-            meta_slug = meta.get("slug", "").lower()
-            program_name = meta.get("program", "").lower() 
-            meta_category = meta.get("category", "").lower()
-            meta_section = meta.get("section", "").lower()
-            
-            # Track match quality to calculate boost
-            program_match_quality = 0.0
-            category_match_quality = 0.0
-            
-            # Check program/slug match
-            if filters.get("slug"):
-                slug_query = filters["slug"].lower().replace('-', ' ')
-                
-                # Exact matches get highest program match quality
-                if slug_query == meta_slug or slug_query == program_name:
-                    program_match_quality = 1.0
-                # Partial but good matches get medium program match quality
-                elif slug_query in meta_slug or slug_query in program_name:
-                    program_match_quality = 0.8
-                # Word-level matches get lower program match quality
-                else:
-                    terms = slug_query.split()
-                    if any(term in program_name for term in terms):
-                        # More matching terms = higher quality
-                        matching_terms = sum(1 for term in terms if term in program_name)
-                        match_ratio = matching_terms / len(terms)
-                        program_match_quality = match_ratio * 0.6
-            
-            # Check for category match - give this high importance
-            if filters.get("category"):
-                wanted = {c.strip().lower() for c in filters["category"].split(",")}
-                
-                # Direct category match
-                if meta_category and meta_category in wanted:
-                    category_match_quality = 1.0
-                # Section match (slightly lower quality)
-                elif meta_section and any(cat in meta_section for cat in wanted):
-                    category_match_quality = 0.8
-                # Contains a keyword from category
-                elif any(cat in meta_category for cat in wanted) or any(cat in meta_section for cat in wanted):
-                    category_match_quality = 0.6
-                # Look for category keywords in content (lower priority)
-                elif doc.page_content and any(cat in doc.page_content.lower() for cat in wanted):
-                    category_match_quality = 0.4
-            else:
-                # If no category filter, don't penalize
-                category_match_quality = 0.5
-                
-            # Calculate final match quality - prioritize exact program+category matches
-            # Program match should always be more important
-            match_quality = 0.0
-            
-            if program_match_quality > 0:
-                # For matching programs, significantly boost documents with matching categories
-                if category_match_quality > 0.7:
-                    # When we have a specific category and a matching program, this should be top priority
-                    match_quality = program_match_quality * 1.5 + category_match_quality
+    def retrieve_batch(self, queries: List[str],
+                       filters_list: Optional[List[Dict[str, str]]] = None
+                       ) -> List[List[Tuple[float, Tuple[object, float]]]]:
+        """
+        Retrieve for many queries against the same index in one pass.
+
+        All queries are embedded with a single embed_documents call and sent
+        through one batched FAISS search, so the document matrix crosses the
+        memory bus once per batch instead of once per query; filtering and
+        reranking then run per query on the precomputed dense hits. Batches
+        too small to benefit fall back to the per-query path.
+
+        When the embedding backend is remote, the single batched call also
+        collapses N network round-trips into one - strictly better than
+        overlapping N async per-query requests.
+        """
+        if filters_list is None:
+            filters_list = [{} for _ in queries]
+        if len(queries) <= 2:
+            return [self.retrieve(q, f) for q, f in zip(queries, filters_list)]
+
+        try:
+            # Apply the same query enhancement as retrieve so the batched
+            # embeddings match what the per-query path would embed
+            enhanced = []
+            for query, filters in zip(queries, filters_list):
+                slug_spaced = filters.get("slug", "").lower().replace("-", " ")
+                if slug_spaced and slug_spaced not in query.lower():
+                    enhanced.append(f"{query} {slug_spaced}")
                 else:
-                    match_quality = program_match_quality + category_match_quality * 0.3
+                    enhanced.append(query)
+
+            # Google embeddings are task-typed: plain embed_documents uses
+            # retrieval_document, which yields different vectors than the
+            # retrieval_query type embed_query uses. Pin the query task type
+            # so batched results match the per-query path.
+            if isinstance(self.emb, GoogleGenerativeAIEmbeddings):
+                vecs = self.emb.embed_documents(enhanced, task_type="retrieval_query")
             else:
-                # For non-matching programs, still include but with lower quality
-                if category_match_quality > 0.8:
-                    # High-quality category match for non-matching program (generic info)
-                    match_quality = category_match_quality * 0.5
-                else:
-                    # Low quality match all around
-                    match_quality = 0.1
-            
-            # Decide if document passes filters and calculate boost
-            if program_match_quality > 0 or (filters.get("category") and category_match_quality > 0.5):
-                # Calculate a boost factor based on match quality (1.0-3.0)
-                boost = 1.0 + match_quality * 2.0
-                return True, boost
-            
-            # If we have filters but nothing matched well, reject
-            if filters.get("slug") or filters.get("category"):
-                return False, 1.0
-                
+                vecs = self.emb.embed_documents(enhanced)
+            q_mat = np.ascontiguousarray(vecs, dtype=np.float32)
+            if self._dense_ip:
+                q_mat /= np.maximum(np.linalg.norm(q_mat, axis=1, keepdims=True), 1e-12)
+            distances, indices = self.vdb.index.search(q_mat, self.cfg["n_dense"])
+        except Exception as e:
+            logger.error(f"Error in batched dense search: {str(e)}")
+            return [self.retrieve(q, f) for q, f in zip(queries, filters_list)]
+
+        return [self.retrieve(q, f, _dense_hit=(distances[i], indices[i]))
+                for i, (q, f) in enumerate(zip(queries, filters_list))]
+
+    def _apply_filters_with_boosting(self, merged_results: Dict[str, Tuple[object, float]],
+                      slug_query: str, wanted: Optional[frozenset]) -> List[Tuple[object, float]]:
+        """Apply filters to the merged results and boost exact matches.
+
+        Reads metadata from the lowercased structure-of-arrays lists built in
+        __init__ (via _id_to_idx), so the per-candidate work is comparisons
+        only - no str.lower()/split() and no metadata dict lookups per query.
+        slug_query and wanted arrive pre-lowercased from retrieve. The old
+        per-doc decision tree is computed here as whole-candidate-set numpy
+        arrays: boolean masks per match tier, np.where chains for the tiered
+        qualities, and a single boost/pass evaluation at the end.
+        """
+        items = list(merged_results.items())
+        if not items:
+            return []
+        n = len(items)
+        slug_terms = slug_query.split()
+        idx = np.fromiter((self._id_to_idx[key] for key, _ in items),
+                          dtype=np.int64, count=n)
+        scores = np.fromiter((score for _, (_, score) in items),
+                             dtype=np.float32, count=n)
+
+        slug_arr = [self._meta_slug_lc[i] for i in idx]
+        prog_arr = [self._meta_program_lc[i] for i in idx]
+        cat_arr = [self._meta_category_lc[i] for i in idx]
+        sec_arr = [self._meta_section_lc[i] for i in idx]
+
+        # Program match quality: exact (1.0) > containment (0.8) > word overlap
+        if slug_query:
+            exact = np.fromiter((slug_query == s or slug_query == p
+                                 for s, p in zip(slug_arr, prog_arr)), bool, n)
+            contains = np.fromiter((slug_query in s or slug_query in p
+                                    for s, p in zip(slug_arr, prog_arr)), bool, n)
+            # More matching terms = higher quality
+            ratio = np.fromiter((sum(1 for t in slug_terms if t in p) / len(slug_terms)
+                                 for p in prog_arr), np.float32, n)
+            program_quality = np.where(exact, np.float32(1.0),
+                                       np.where(contains, np.float32(0.8),
+                                                ratio * np.float32(0.6)))
+        else:
+            program_quality = np.zeros(n, dtype=np.float32)
+
+        # Category match quality: direct (1.0) > section (0.8) > keyword (0.6)
+        # > content flags precomputed in __init__ (0.4); 0.5 when unfiltered
+        if wanted is not None:
+            direct = np.fromiter((bool(c) and c in wanted for c in cat_arr), bool, n)
+            in_section = np.fromiter((bool(s) and any(cat in s for cat in wanted)
+                                      for s in sec_arr), bool, n)
+            keyword = np.fromiter((any(cat in c for cat in wanted) or any(cat in s for cat in wanted)
+                                   for c, s in zip(cat_arr, sec_arr)), bool, n)
+            content = np.fromiter((bool(wanted & self.docs[i]._content_cats) for i in idx), bool, n)
+            category_quality = np.select([direct, in_section, keyword, content],
+                                         [1.0, 0.8, 0.6, 0.4], 0.0).astype(np.float32)
+        else:
+            category_quality = np.full(n, 0.5, dtype=np.float32)
+
+        # Final match quality - prioritize exact program+category matches;
+        # program match should always be more important
+        match_quality = np.where(
+            program_quality > 0,
+            np.where(category_quality > 0.7,
+                     program_quality * np.float32(1.5) + category_quality,
+                     program_quality + category_quality * np.float32(0.3)),
+            np.where(category_quality > 0.8,
+                     category_quality * np.float32(0.5), np.float32(0.1)))
+
+        # Pass when the program matched or a category filter matched well;
+        # boost factor scales 1.0-3.0 with match quality
+        passes = program_quality > 0
+        if wanted is not None:
+            passes |= category_quality > 0.5
+        boost = np.where(passes, np.float32(1.0) + match_quality * np.float32(2.0),
+                         np.float32(1.0))
+        if not slug_query and wanted is None:
             # Default pass for documents when no filters active
-            return True, 1.0
-
-        # Apply filters and collect results with boost factors
-        results_with_boost = []
-        for doc, score in merged_results.values():
-            passed, boost = ok(doc.metadata)
-            if passed:
-                results_with_boost.append((doc, score * boost))
+            passes = np.ones(n, dtype=bool)
+        passes &= self._meta_present[idx]
+
+        boosted = scores * boost
+        results_with_boost = [(items[j][1][0], float(boosted[j]))
+                              for j in np.flatnonzero(passes)]
         
         # If filtering removed everything but we had filters, try with relaxed filters
-        if not results_with_boost and filters.get("slug"):
+        if not results_with_boost and slug_query:
             logger.warning("All results filtered out. Trying with relaxed filters...")
-            for doc, score in merged_results.values():
-                meta = doc.metadata
-                if not meta:
+            for key, (doc, score) in merged_results.items():
+                i = self._id_to_idx[key]
+                if not self._meta_present[i]:
                     continue
-                
+
                 # Very relaxed matching for program name
-                slug_query = filters["slug"].lower().replace('-', ' ')
-                program_name = meta.get("program", "").lower()
-                
+                program_name = self._meta_program_lc[i]
+
                 # Check for any significant word overlap
-                for word in slug_query.split():
+                for word in slug_terms:
                     if len(word) > 3 and word in program_name:
                         # Add but with lower score
                         results_with_boost.append((doc, score * 0.8))
@@ -258,34 +703,36 @@ class HybridRetriever:
         # Sort by boosted score
         results_with_boost.sort(key=lambda x: x[1], reverse=True)
         
-        if results_with_boost:
+        if results_with_boost and logger.isEnabledFor(logging.DEBUG):
             top_doc = results_with_boost[0][0]
-            logger.info(f"Found {len(results_with_boost)} results, top: {top_doc.metadata.get('program', 'unknown')} | {top_doc.metadata.get('category', '-')} | {top_doc.metadata.get('section', '-')}")
+            logger.debug("Found %d results, top: %s | %s | %s",
+                         len(results_with_boost), top_doc.metadata.get('program', 'unknown'),
+                         top_doc.metadata.get('category', '-'), top_doc.metadata.get('section', '-'))
         
         return results_with_boost
         
-    def _rerank_with_exact_priority(self, query: str, filtered_results: List[Tuple[object, float]], 
-                                   filters: Dict[str, str]) -> List[Tuple[float, Tuple[object, float]]]:
-        """Rerank filtered results using cross-encoder but prioritize exact program+category matches"""
+    def _rerank_with_exact_priority(self, query: str, filtered_results: List[Tuple[object, float]],
+                                   target_program: str, target_category: str) -> List[Tuple[float, Tuple[object, float]]]:
+        """Rerank filtered results using cross-encoder but prioritize exact program+category matches.
+
+        target_program and target_category arrive pre-lowercased from retrieve.
+        """
         try:
             # First, separate documents by match quality
             exact_program_category_matches = []
             exact_program_matches = []
             other_matches = []
-            
-            target_program = filters.get("slug", "").lower().replace("-", " ")
-            target_category = filters.get("category", "").lower()
-            
+
             # Check if we have program and category filters
             has_program_filter = bool(target_program)
             has_category_filter = bool(target_category)
             
             if has_program_filter or has_category_filter:
                 for doc, score in filtered_results:
-                    meta = doc.metadata
-                    program = meta.get("program", "").lower()
-                    category = meta.get("category", "").lower()
-                    section = meta.get("section", "").lower()
+                    row = doc._row
+                    program = self._meta_program_lc[row]
+                    category = self._meta_category_lc[row]
+                    section = self._meta_section_lc[row]
                     
                     # Check for exact program + category match
                     is_program_match = has_program_filter and target_program in program
@@ -306,9 +753,8 @@ class HybridRetriever:
                 other_matches = filtered_results
             
             # Log how many documents in each match tier
-            logger.info(f"Exact program+category matches: {len(exact_program_category_matches)}, "
-                      f"Program-only matches: {len(exact_program_matches)}, "
-                      f"Other matches: {len(other_matches)}")
+            logger.debug("Exact program+category matches: %d, Program-only matches: %d, Other matches: %d",
+                         len(exact_program_category_matches), len(exact_program_matches), len(other_matches))
                       
             # Decide which group to rerank
             top_m = self.cfg.get("top_m", 12)
@@ -317,20 +763,25 @@ class HybridRetriever:
             # If we have exact program+category matches, prioritize those
             if exact_program_category_matches:
                 results_to_rerank = exact_program_category_matches[:top_m]
-                logger.info(f"Using {len(results_to_rerank)} exact program+category matches for reranking")
+                logger.debug("Using %d exact program+category matches for reranking", len(results_to_rerank))
             # Otherwise use program matches, supplemented with other if needed
             elif exact_program_matches:
                 results_to_rerank = exact_program_matches[:top_m]
-                logger.info(f"Using {len(results_to_rerank)} program matches for reranking")
+                logger.debug("Using %d program matches for reranking", len(results_to_rerank))
             # Otherwise use other matches
             else:
                 results_to_rerank = other_matches[:top_m]
-                logger.info(f"Using {len(results_to_rerank)} other matches for reranking")
-                
+                logger.debug("Using %d other matches for reranking", len(results_to_rerank))
+
+            # With this few candidates the cross-encoder cannot change the
+            # outcome - return them on their base scores and skip the call
+            if results_to_rerank and len(results_to_rerank) <= self.cfg.get("rerank_skip_threshold", 1):
+                logger.debug("Only %d candidate(s), skipping rerank", len(results_to_rerank))
+                return [(base, (doc, base)) for doc, base in results_to_rerank]
+
             # Perform reranking on the selected subset
             if results_to_rerank:
-                pairs = [[query, doc.page_content] for doc, _ in results_to_rerank]
-                logits = self.rerank.predict(pairs, batch_size=8, convert_to_numpy=True)
+                logits = self._ce_predict_cached(query, [doc for doc, _ in results_to_rerank])
                 
                 # Convert to list of (score, (doc, base_score)) for final sorting
                 reranked = []
@@ -344,17 +795,17 @@ class HybridRetriever:
                 top_k = self.cfg.get("top_k", 8)
                 results = reranked[:top_k]
                 
-                logger.info(f"Reranked {len(results_to_rerank)} documents, returning top {len(results)}")
+                logger.debug("Reranked %d documents, returning top %d", len(results_to_rerank), len(results))
                 
                 # Add in extra high-priority documents if needed
-                if len(exact_program_category_matches) > 0 and not any(doc.metadata.get("program", "").lower() == target_program and 
-                                              doc.metadata.get("category", "").lower() == "apply" 
+                if len(exact_program_category_matches) > 0 and not any(self._meta_program_lc[doc._row] == target_program and
+                                              self._meta_category_lc[doc._row] == "apply"
                                               for _, (doc, _) in results[:3]):
                     # Find a good apply document to insert at position 1
                     for doc, base in exact_program_category_matches:
-                        if doc.metadata.get("category", "").lower() == "apply":
+                        if self._meta_category_lc[doc._row] == "apply":
                             # Insert at position 1 with artificially high score
-                            logger.info(f"Inserting application document at position 1: {doc.metadata.get('section', '')}")
+                            logger.debug("Inserting application document at position 1: %s", doc.metadata.get('section', ''))
                             results.insert(0, (1.0, (doc, base)))
                             results = results[:top_k]  # Keep to top_k
                             break
@@ -371,52 +822,43 @@ class HybridRetriever:
             top_k = self.cfg.get("top_k", 8)
             return [(item[1], item) for item in sorted_results[:top_k]]
 
-    def _find_program_application_docs(self, program_name: str) -> List[object]:
-        """Directly find application documents for a specific program by metadata"""
+    _APPLICATION_SECTION_TERMS = (
+        "application_process",
+        "admission_process",
+        "application_deadlines",
+        "documents_required",
+        "documents_required_for_online_application",
+        "documents_required_for_enrollment",
+        "application_period",
+        "application"
+    )
+
+    def _collect_application_docs(self, idxs: List[int]) -> List[object]:
+        """Filter, sort and dedup application documents for one program's rows"""
         application_docs = []
-        application_section_terms = [
-            "application_process", 
-            "admission_process", 
-            "application_deadlines", 
-            "documents_required",
-            "documents_required_for_online_application",
-            "documents_required_for_enrollment",
-            "application_period",
-            "application"
-        ]
-        
-        # Ensure program name is lowercase for matching
-        program_name = program_name.lower()
-        
-        for doc in self.docs:
-            meta = doc.metadata
-            
-            # Check for program match
-            doc_program = meta.get("program", "").lower()
-            # Check for either exact match or if the program name is contained in the document program
-            if not (program_name == doc_program or program_name in doc_program):
-                continue
-                
+        for i in idxs:
             # Check for application-related section
-            section = meta.get("section", "").lower()
-            if any(term in section for term in application_section_terms):
-                application_docs.append(doc)
-                logger.info(f"Found {doc_program} application document: {section}")
-                
+            section = self._meta_section_lc[i]
+            if any(term in section for term in self._APPLICATION_SECTION_TERMS):
+                application_docs.append(self.docs[i])
+
             # Also check category
-            category = meta.get("category", "").lower()
-            if category == "apply" and section:
-                application_docs.append(doc)
-                logger.info(f"Found {doc_program} application document (category apply): {section}")
-        
+            if self._meta_category_lc[i] == "apply" and section:
+                application_docs.append(self.docs[i])
+        return self._sort_application_docs(application_docs)
+
+    @staticmethod
+    def _sort_application_docs(application_docs: List[object]) -> List[object]:
         # Sort by section relevance - application process first, then documents, then deadlines
-        application_docs.sort(key=lambda doc: (
-            "application_process" in doc.metadata.get("section", "").lower(),
-            "admission" in doc.metadata.get("section", "").lower(),
-            "deadline" in doc.metadata.get("section", "").lower(),
-            "document" in doc.metadata.get("section", "").lower()
-        ), reverse=True)
-        
+        def _section_rank(doc):
+            section = doc.metadata.get("section", "").lower()
+            return ("application_process" in section,
+                    "admission" in section,
+                    "deadline" in section,
+                    "document" in section)
+
+        application_docs = sorted(application_docs, key=_section_rank, reverse=True)
+
         # Remove duplicates while preserving order
         unique_docs = []
         seen_sections = set()
@@ -425,6 +867,21 @@ class HybridRetriever:
             if section not in seen_sections:
                 unique_docs.append(doc)
                 seen_sections.add(section)
-                
+
         return unique_docs
 
+    def _find_program_application_docs(self, program_name: str) -> List[object]:
+        """Find application documents for a specific program via the prebuilt per-program index"""
+        program_name = program_name.lower()
+
+        # Exact program name: O(1) lookup of the precomputed result
+        docs = self._apply_docs_by_program.get(program_name)
+        if docs is not None:
+            return docs
+
+        # Partial match: merge the precomputed groups of every program whose
+        # name contains the query string, then re-sort and dedup the union
+        merged = [doc for prog, group in self._apply_docs_by_program.items()
+                  if program_name in prog for doc in group]
+        return self._sort_application_docs(merged)
+
@@ -4,20 +4,31 @@
 Improved Hybrid Retriever with enhanced query understanding and chunking
 """
 
-import pickle, re, pathlib, yaml, logging, os
+import hashlib, heapq, pickle, re, pathlib, threading, yaml, logging, os
+import numpy as np
+from collections import OrderedDict
 from typing import List, Tuple, Dict, Optional
-from rank_bm25 import BM25Okapi
 from sentence_transformers import CrossEncoder
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from langchain_community.vectorstores import FAISS
 from improved_query_parser import enhanced_parse_query, convert_to_legacy_format
+from bm25_index import BM25Index
+from embed_cache import PersistentEmbedCache
 from dotenv import load_dotenv
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Precompiled tokenizer pattern plus a translation table mapping ASCII
+# non-word bytes to spaces: all-ASCII text (the common case) tokenizes with
+# lower/translate/split entirely at C level, no regex machinery
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_ASCII_TBL = str.maketrans({chr(c): " " for c in range(128)
+                            if not (chr(c).isalnum() or chr(c) == "_")})
+
 class ImprovedHybridRetriever:
-    def __init__(self, cfg_path: str = "../config/improved_retriever.yaml"):
+    def __init__(self, cfg_path: str = "../config/improved_retriever.yaml",
+                 reranker: Optional[CrossEncoder] = None):
         try:
             # Load environment variables
             load_dotenv()
@@ -33,35 +44,227 @@ class ImprovedHybridRetriever:
             
             # Initialize embeddings and vector store
             self.emb = GoogleGenerativeAIEmbeddings(model=cfg["embed_model"], google_api_key=api_key)
-            self.vdb = FAISS.load_local(cfg["index_dir"], self.emb,
-                                        allow_dangerous_deserialization=True)
-            
+            self.vdb = self._load_vectordb(cfg["index_dir"])
+            # Fail fast if the embedding model and the index disagree on
+            # dimensionality: otherwise every search raises per query and
+            # retrieve's broad except turns that into silent empty results
+            probe_dim = len(self.emb.embed_query("dimension probe"))
+            if probe_dim != self.vdb.index.d:
+                raise ValueError(
+                    f"Embedding model yields {probe_dim}-d vectors but the index "
+                    f"at {cfg['index_dir']} stores {self.vdb.index.d}-d - rebuild "
+                    f"it with vectorize.py using the same backend/model")
+            # Flat scans are BLAS-tiled and scale across cores; faiss
+            # defaults are conservative in some builds, so pin explicitly
+            import faiss
+            faiss.omp_set_num_threads(os.cpu_count() or 1)
+            # ANN indexes built by build_ann_index.py expose query-time
+            # recall/speed knobs; both checks are no-ops on a flat index
+            if hasattr(self.vdb.index, "hnsw"):
+                self.vdb.index.hnsw.efSearch = cfg.get("efSearch", 64)
+            if hasattr(self.vdb.index, "nprobe") and cfg.get("nprobe"):
+                self.vdb.index.nprobe = cfg["nprobe"]
+            # Indexes built with vectorize.py --normalize use inner product
+            # over unit vectors: scores are cosine already, no 1 - distance
+            self._dense_ip = (getattr(self.vdb.index, "metric_type", faiss.METRIC_L2)
+                              == faiss.METRIC_INNER_PRODUCT)
+
+
             # Load BM25 index
             try:
                 with open(pathlib.Path(cfg["index_dir"]) / "bm25.pkl", "rb") as f:
                     pack = pickle.load(f)
-                self.bm25: BM25Okapi = pack["bm25"]
                 self.docs = pack["docs"]
-            except FileNotFoundError:
-                logger.error(f"BM25 index file not found at {cfg['index_dir']}/bm25.pkl")
+                self.bm25 = BM25Index.load(cfg["index_dir"])
+                self.bm25.warmup()      # JIT-compile the scoring kernels now
+            except (FileNotFoundError, KeyError):
+                logger.error(f"BM25 index not found or outdated at {cfg['index_dir']} - "
+                             f"re-run src/rag/build_bm25.py")
                 raise
-            
-            # Initialize reranker
-            self.rerank = CrossEncoder(cfg["reranker_model"])
-            
+
+            # Lowercased metadata as structure-of-arrays aligned with
+            # self.docs, plus an id -> row map, so the filter step reads
+            # flat arrays instead of metadata dicts per candidate per query
+            self._prog_arr: List[str] = []
+            self._cat_arr: List[str] = []
+            self._section_arr: List[str] = []
+            self._chunk_type_arr: List[str] = []
+            self._id_to_idx: Dict[object, int] = {}
+            for i, doc in enumerate(self.docs):
+                meta = doc.metadata or {}
+                self._prog_arr.append(meta.get("program", "").lower())
+                self._cat_arr.append(meta.get("category", "").lower())
+                self._section_arr.append(meta.get("section", "").lower())
+                self._chunk_type_arr.append(meta.get("chunk_type") or "")
+                self._id_to_idx[meta.get("id") or id(doc)] = i
+
+            # Optionally run dense search and reranking on GPU - both are
+            # drop-in moves (faiss index_cpu_to_gpu / CrossEncoder device)
+            device = None
+            if cfg.get("use_gpu", False):
+                import torch
+                if torch.cuda.is_available():
+                    device = "cuda"
+                    try:
+                        import faiss
+                        res = faiss.StandardGpuResources()
+                        self.vdb.index = faiss.index_cpu_to_gpu(res, 0, self.vdb.index)
+                        self._gpu_res = res         # must outlive the GPU index
+                    except AttributeError:
+                        logger.warning("faiss build has no GPU support, index stays on CPU")
+                    # GPU has headroom for much larger rerank batches
+                    cfg["reranker_batch_size"] = max(cfg.get("reranker_batch_size", 16), 64)
+                else:
+                    logger.warning("use_gpu is set but no CUDA device is available")
+
+            # Initialize reranker - same backend options as HybridRetriever:
+            # onnx picks up INT8 exports from src/rag/quantize_reranker.py,
+            # torch gets fp16 on GPU and optional torch.compile fusion.
+            # An injected instance (shared with another retriever) skips the
+            # multi-second model load entirely.
+            if reranker is not None:
+                self.rerank = reranker
+                logger.info("Reusing injected reranker instance")
+            else:
+                backend = cfg.get("reranker_backend", "torch")
+                ce_kwargs = {"device": device,
+                             "max_length": cfg.get("reranker_max_length", 256),
+                             # Rust tokenizer: much faster pre-tokenization
+                             # and it releases the GIL during batching
+                             "tokenizer_args": {"use_fast": True}}
+                if backend == "onnx":
+                    import onnxruntime as ort
+                    so = ort.SessionOptions()
+                    so.intra_op_num_threads = os.cpu_count() or 1
+                    so.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+                    ce_kwargs["backend"] = "onnx"
+                    ce_kwargs["model_kwargs"] = {
+                        "provider": "CUDAExecutionProvider" if device == "cuda" else "CPUExecutionProvider",
+                        "session_options": so,
+                    }
+                    if cfg.get("reranker_model_file"):
+                        ce_kwargs["model_kwargs"]["file_name"] = cfg["reranker_model_file"]
+                self.rerank = CrossEncoder(cfg["reranker_model"], **ce_kwargs)
+                if device == "cuda" and backend == "torch":
+                    self.rerank.model.half()
+                if cfg.get("compile_reranker", False) and backend == "torch":
+                    import torch
+                    self.rerank.model = torch.compile(self.rerank.model, mode="reduce-overhead")
+                    logger.info("Reranker model compiled with torch.compile")
+
+            # Predict calls must be serialized: the fast tokenizer mutates
+            # per-call padding/truncation state and raises "Already borrowed"
+            # when two threads hit it at once (e.g. two retrievers sharing
+            # one injected instance). The lock lives on the CrossEncoder so
+            # every sharer serializes against the same one.
+            lock = getattr(self.rerank, "_predict_lock", None)
+            if lock is None:
+                lock = threading.Lock()
+                self.rerank._predict_lock = lock
+            self._rerank_lock = lock
+
+            self._embed_cache = OrderedDict()   # query_hash -> float32 vector
+            # Disk-backed second level keyed by (model, sha256(text)) - hits
+            # survive restarts and are shared across processes and test runs
+            self._disk_embed_cache = None
+            if cfg.get("embed_cache", True):
+                try:
+                    self._disk_embed_cache = PersistentEmbedCache(
+                        pathlib.Path(cfg["index_dir"]) / "embed_cache.sqlite",
+                        cfg["embed_model"])
+                except Exception as e:
+                    logger.warning(f"Persistent embed cache disabled: {str(e)}")
+
+
         except Exception as e:
             logger.error(f"Error initializing ImprovedHybridRetriever: {str(e)}")
             raise
 
+    def _load_vectordb(self, index_dir: str) -> FAISS:
+        """Load the FAISS store with the index memory-mapped read-only.
+
+        FAISS.load_local reads the whole index into per-process RAM; mapping
+        it instead lets multiple workers share one copy through the page
+        cache. Falls back to the regular loader for index types that do not
+        support mmap.
+        """
+        try:
+            import faiss
+            path = pathlib.Path(index_dir)
+            index = faiss.read_index(str(path / "index.faiss"),
+                                     faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+            with open(path / "index.pkl", "rb") as f:
+                docstore, index_to_docstore_id = pickle.load(f)
+            return FAISS(embedding_function=self.emb, index=index,
+                         docstore=docstore, index_to_docstore_id=index_to_docstore_id)
+        except Exception as e:
+            logger.warning(f"mmap load of FAISS index failed ({str(e)}), falling back to load_local")
+            return FAISS.load_local(index_dir, self.emb,
+                                    allow_dangerous_deserialization=True)
+
     @staticmethod
     def _tokenize(text: str) -> List[str]:
-        return re.findall(r"\w+", text.lower())
+        text = text.lower()
+        if text.isascii():
+            return text.translate(_ASCII_TBL).split()
+        return _WORD_RE.findall(text)
+
+    def _amp_ctx(self):
+        """Autocast context for reranker forwards, or a no-op.
+
+        Gated by reranker_amp and only meaningful for the torch backend:
+        fp16 autocast on CUDA, bfloat16 on CPU (fast on AVX-512 BF16 /
+        AMX hardware, a slowdown on older cores - hence opt-in).
+        """
+        import contextlib
+        if (not self.cfg.get("reranker_amp", False)
+                or self.cfg.get("reranker_backend", "torch") != "torch"):
+            return contextlib.nullcontext()
+        import torch
+        if torch.cuda.is_available():
+            return torch.autocast("cuda", dtype=torch.float16)
+        return torch.autocast("cpu", dtype=torch.bfloat16)
+
+    _EMBED_CACHE_SIZE = 4096
+    _CE_CHAR_CAP = 1200     # ~256 BPE tokens; matches reranker_max_length
+
+    def _embed_query(self, query: str) -> np.ndarray:
+        """Query embedding with an LRU cache keyed by text hash.
+
+        Repeated queries (evaluation sweeps, UI retries) skip the embedding
+        RPC entirely; the cached vector is already contiguous float32.
+        """
+        key = hashlib.blake2b(query.encode(), digest_size=16).digest()
+        vec = self._embed_cache.get(key)
+        if vec is None:
+            if self._disk_embed_cache is not None:
+                vec = self._disk_embed_cache.get(query)
+            if vec is None:
+                vec = np.ascontiguousarray(self.emb.embed_query(query), dtype=np.float32)
+                if self._disk_embed_cache is not None:
+                    self._disk_embed_cache.put(query, vec)
+            if self._dense_ip:
+                # unit-norm the query so IP search returns cosine
+                norm = float(np.linalg.norm(vec))
+                if norm:
+                    vec = vec / norm
+            self._embed_cache[key] = vec
+            if len(self._embed_cache) > self._EMBED_CACHE_SIZE:
+                self._embed_cache.popitem(last=False)
+        else:
+            self._embed_cache.move_to_end(key)
+        return vec
 
     def _expand_query(self, query: str, intent) -> str:
         """Expand query with synonyms and related terms based on intent"""
         if not self.cfg.get("query_expansion", False):
             return query
-            
+
+        # Nothing below can contribute a term for this intent - skip the
+        # list/string building (and keep the embedded query short)
+        if not (intent.temporal_keywords or intent.category == "apply" or intent.program):
+            return query
+
         expanded_terms = []
         
         # Add deadline-specific terms for deadline queries
@@ -85,14 +288,46 @@ class ImprovedHybridRetriever:
         
         return query
 
-    def _bm25_search(self, query: str, k: int) -> List[Tuple[object, float]]:
-        tok = self._tokenize(query)
-        scores = self.bm25.get_scores(tok)
-        idxs = scores.argsort()[-k:][::-1]
-        mx = scores.max() or 1
-        return [(self.docs[i], scores[i] / mx) for i in idxs]
+    def _dense_search(self, query: str, k: int,
+                      dense_hit: Optional[Tuple[np.ndarray, np.ndarray]] = None
+                      ) -> Tuple[np.ndarray, np.ndarray]:
+        """Dense top-k as (doc row indices, similarity scores) arrays.
 
-    def retrieve(self, query: str, enhanced_parsing: bool = True) -> List[Tuple[float, Tuple[object, float]]]:
+        FAISS requires C-contiguous float32 and silently copies otherwise.
+        dense_hit optionally carries a (distances, indices) row precomputed
+        by retrieve_batch, skipping the per-query embed + search.
+        """
+        if dense_hit is None:
+            # reshape is a zero-copy view over the cached contiguous
+            # vector, so a repeated query allocates nothing here
+            q_vec = self._embed_query(query).reshape(1, -1)
+            distances, indices = self.vdb.index.search(q_vec, k)
+            dense_hit = (distances[0], indices[0])
+        d_row, i_row = dense_hit
+        hits = i_row[i_row != -1]
+        if self._dense_ip:
+            sims = d_row[: len(hits)]                 # IP index: already cosine
+        else:
+            sims = 1.0 - d_row[: len(hits)]           # Distance → Similarity 0-1
+        return hits, sims.astype(np.float32)
+
+    def _bm25_search(self, query: str, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """BM25 top-k as (doc row indices, normalized scores) arrays.
+
+        Routed through BM25Index.get_top_k, whose MaxScore-pruned kernel
+        skips postings that cannot lift a document into the top-k. Scores
+        of the surviving documents stay exact, so the best of them is
+        still the global max used for normalization.
+        """
+        idxs, scores = self.bm25.get_top_k(self._tokenize(query), k)
+        if idxs.size == 0:
+            return idxs, np.empty(0, dtype=np.float32)
+        mx = scores[idxs[0]] or 1
+        return idxs, (scores[idxs] / mx).astype(np.float32)
+
+    def retrieve(self, query: str, enhanced_parsing: bool = True,
+                 _dense_hit: Optional[Tuple[np.ndarray, np.ndarray]] = None
+                 ) -> List[Tuple[float, Tuple[object, float]]]:
         """
         Enhanced retrieval with improved query understanding
         """
@@ -112,26 +347,51 @@ class ImprovedHybridRetriever:
             
             logger.info(f"Processing query: '{query}' with filters: {filters}")
             
-            # Dense retrieval with expanded query
-            dense = self.vdb.similarity_search_with_score(
-                expanded_query, k=self.cfg["n_dense"]
-            )
-            dense = [(d, 1 - s) for d, s in dense]
-            
+            # Dense retrieval with expanded query - query the FAISS index
+            # directly so the distance -> similarity conversion happens as one
+            # vectorized numpy op instead of a per-doc Python loop
+            d_ids, d_scores = self._dense_search(expanded_query, self.cfg["n_dense"], _dense_hit)
+
             # Sparse retrieval
-            sparse = self._bm25_search(expanded_query, self.cfg["n_sparse"])
-            
-            # Merge results
-            merged: Dict[str, Tuple[object, float]] = {}
-            for doc, score in dense + sparse:
-                key = doc.metadata.get("id") or id(doc)
-                if key not in merged or score > merged[key][1]:
-                    merged[key] = (doc, score)
-            
-            logger.info(f"Dense: {len(dense)}, Sparse: {len(sparse)}, Merged: {len(merged)}")
-            
+            s_ids, s_scores = self._bm25_search(expanded_query, self.cfg["n_sparse"])
+
+            # Merge on index-keyed score arrays: doc rows are stable ints, so
+            # fusing is plain array writes - no string-id hashing, no dict
+            # resizes and no (doc, score) tuple allocations
+            n_docs = len(self.docs)
+            if self.cfg.get("sparse_anchor", False):
+                # Anchor the candidate set on the sparse top-k and back-fill
+                # dense scores where available - ranking the union buys
+                # little over this and roughly doubles the rerank set
+                dense_vec = np.full(n_docs, -np.inf, dtype=np.float32)
+                dense_vec[d_ids] = d_scores
+                cand_idx = s_ids
+                backfill = dense_vec[s_ids]
+                cand_scores = np.where(backfill > -np.inf, backfill, s_scores)
+            elif self.cfg.get("fusion", "max") == "rrf":
+                # Reciprocal Rank Fusion: purely rank-based, so the dense and
+                # sparse score distributions never need to be comparable.
+                # Fused scores are rescaled so the top candidate sits at 1.0,
+                # keeping the downstream thresholds/boosts meaningful.
+                fused = np.zeros(n_docs, dtype=np.float32)
+                fused[d_ids] += 1.0 / (60.0 + np.arange(len(d_ids), dtype=np.float32))
+                fused[s_ids] += 1.0 / (60.0 + np.arange(len(s_ids), dtype=np.float32))
+                cand_idx = np.flatnonzero(fused > 0.0)
+                cand_scores = fused[cand_idx]
+                if cand_scores.size:
+                    cand_scores = cand_scores / cand_scores.max()
+            else:
+                # Max-of-score merge
+                merged_scores = np.full(n_docs, -np.inf, dtype=np.float32)
+                merged_scores[d_ids] = d_scores
+                merged_scores[s_ids] = np.maximum(merged_scores[s_ids], s_scores)
+                cand_idx = np.flatnonzero(merged_scores > -np.inf)
+                cand_scores = merged_scores[cand_idx]
+
+            logger.info(f"Dense: {len(d_ids)}, Sparse: {len(s_ids)}, Merged: {len(cand_idx)}")
+
             # Enhanced filtering with intent awareness
-            filtered_boosted = self._apply_enhanced_filters(merged, filters, intent)
+            filtered_boosted = self._apply_enhanced_filters(cand_idx, cand_scores, filters, intent)
             
             if not filtered_boosted:
                 logger.warning("No results after filtering")
@@ -144,64 +404,114 @@ class ImprovedHybridRetriever:
             logger.error(f"Error in retrieve: {str(e)}")
             return []
 
-    def _apply_enhanced_filters(self, merged_results: Dict[str, Tuple[object, float]], 
+    def retrieve_batch(self, queries: List[str], enhanced_parsing: bool = True
+                       ) -> List[List[Tuple[float, Tuple[object, float]]]]:
+        """
+        Batched retrieval for evaluation/offline workloads.
+
+        Embeds every (expanded) query with one embed_documents call and runs
+        a single multi-row FAISS search, then feeds the precomputed dense
+        rows through the normal per-query pipeline. Tiny batches fall back
+        to the per-query path.
+        """
+        if len(queries) <= 2:
+            return [self.retrieve(q, enhanced_parsing) for q in queries]
+
+        try:
+            # Expand each query exactly as retrieve would, so the batched
+            # embeddings match the per-query path
+            expanded = []
+            for query in queries:
+                if enhanced_parsing:
+                    intent = enhanced_parse_query(query)
+                    expanded.append(self._expand_query(query, intent))
+                else:
+                    expanded.append(query)
+
+            # Google embeddings are task-typed: plain embed_documents uses
+            # retrieval_document, which yields different vectors than the
+            # retrieval_query type embed_query uses. Pin the query task type
+            # so batched results match the per-query path.
+            if isinstance(self.emb, GoogleGenerativeAIEmbeddings):
+                vecs = self.emb.embed_documents(expanded, task_type="retrieval_query")
+            else:
+                vecs = self.emb.embed_documents(expanded)
+            q_mat = np.ascontiguousarray(vecs, dtype=np.float32)
+            if self._dense_ip:
+                q_mat /= np.maximum(np.linalg.norm(q_mat, axis=1, keepdims=True), 1e-12)
+            distances, indices = self.vdb.index.search(q_mat, self.cfg["n_dense"])
+        except Exception as e:
+            logger.error(f"Error in batched dense search: {str(e)}")
+            return [self.retrieve(q, enhanced_parsing) for q in queries]
+
+        return [self.retrieve(q, enhanced_parsing, _dense_hit=(distances[i], indices[i]))
+                for i, q in enumerate(queries)]
+
+    def _apply_enhanced_filters(self, cand_idx: np.ndarray, cand_scores: np.ndarray,
                                filters: Dict[str, str], intent=None) -> List[Tuple[object, float]]:
-        """Enhanced filtering with intent-based boosting"""
-        
-        def calculate_relevance_score(doc, base_score):
-            meta = doc.metadata
-            relevance_multiplier = 1.0
-            
-            # Program matching
-            if filters.get("slug"):
-                target_program = filters["slug"].lower().replace("-", " ")
-                doc_program = meta.get("program", "").lower()
-                
-                if target_program == doc_program or target_program in doc_program:
-                    relevance_multiplier *= self.cfg.get("exact_match_boost", 2.0)
-                elif any(word in doc_program for word in target_program.split()):
-                    relevance_multiplier *= 1.5
-            
-            # Category matching with intent awareness
-            if filters.get("category"):
-                target_category = filters["category"].lower()
-                doc_category = meta.get("category", "").lower()
-                doc_section = meta.get("section", "").lower()
-                
-                # Exact category match
-                if doc_category == target_category:
-                    relevance_multiplier *= self.cfg.get("exact_match_boost", 2.0)
-                
-                # Special handling for deadline queries
-                if (intent and intent.temporal_keywords and 
-                    ("deadline" in doc_section or "period" in doc_section)):
-                    relevance_multiplier *= self.cfg.get("deadline_priority_boost", 3.0)
-                    logger.info(f"Applied deadline boost to: {doc_section}")
-                
-                # Priority chunk type boosting
-                if (self.cfg.get("prefer_specialized_chunks", True) and 
-                    meta.get("chunk_type") in ["deadline", "application"]):
-                    relevance_multiplier *= 2.0
-                    logger.info(f"Applied specialized chunk boost: {meta.get('chunk_type')}")
-            
-            # Semantic similarity boost
-            if base_score > 0.8:  # High semantic similarity
-                relevance_multiplier *= self.cfg.get("semantic_boost", 1.5)
-            
-            return base_score * relevance_multiplier
-        
-        # Apply enhanced scoring
-        results_with_scores = []
-        for doc, base_score in merged_results.values():
-            enhanced_score = calculate_relevance_score(doc, base_score)
-            
-            # Apply minimum threshold
-            if enhanced_score > 0.1:  # Minimum relevance threshold
-                results_with_scores.append((doc, enhanced_score))
-        
-        # Sort by enhanced scores
-        results_with_scores.sort(key=lambda x: x[1], reverse=True)
-        
+        """Enhanced filtering with intent-based boosting.
+
+        Takes the merged candidates as (doc row indices, base scores) arrays
+        from retrieve; the relevance multipliers are computed as numpy masks
+        over the whole candidate set, reading the metadata structure-of-arrays
+        built in __init__ instead of per-doc dicts and .lower() calls.
+        """
+        n = len(cand_idx)
+        if not n:
+            return []
+        idx = cand_idx
+        base = cand_scores
+        multiplier = np.ones(n, dtype=np.float32)
+
+        # Program matching
+        if filters.get("slug"):
+            target_program = filters["slug"].lower().replace("-", " ")
+            words = target_program.split()
+            progs = [self._prog_arr[i] for i in idx]
+            exact = np.fromiter((target_program == p or target_program in p
+                                 for p in progs), bool, n)
+            partial = np.fromiter((any(word in p for word in words)
+                                   for p in progs), bool, n)
+            multiplier *= np.where(exact, np.float32(self.cfg.get("exact_match_boost", 2.0)),
+                                   np.where(partial, np.float32(1.5), np.float32(1.0)))
+
+        # Category matching with intent awareness
+        if filters.get("category"):
+            target_category = filters["category"].lower()
+
+            # Exact category match
+            cat_exact = np.fromiter((self._cat_arr[i] == target_category for i in idx), bool, n)
+            multiplier[cat_exact] *= self.cfg.get("exact_match_boost", 2.0)
+
+            # Special handling for deadline queries
+            if intent and intent.temporal_keywords:
+                deadline = np.fromiter(("deadline" in self._section_arr[i]
+                                        or "period" in self._section_arr[i]
+                                        for i in idx), bool, n)
+                multiplier[deadline] *= self.cfg.get("deadline_priority_boost", 3.0)
+                if deadline.any():
+                    logger.debug("Applied deadline boost to %d candidates", int(deadline.sum()))
+
+            # Priority chunk type boosting
+            if self.cfg.get("prefer_specialized_chunks", True):
+                special = np.fromiter((self._chunk_type_arr[i] in ("deadline", "application")
+                                       for i in idx), bool, n)
+                multiplier[special] *= 2.0
+                if special.any():
+                    logger.debug("Applied specialized chunk boost to %d candidates", int(special.sum()))
+
+        # Semantic similarity boost for high semantic similarity
+        multiplier[base > 0.8] *= self.cfg.get("semantic_boost", 1.5)
+
+        # Apply minimum relevance threshold and sort by enhanced scores
+        enhanced = base * multiplier
+        results_with_scores = [(self.docs[int(idx[j])], float(enhanced[j]))
+                               for j in np.flatnonzero(enhanced > 0.1)]
+        # Only top_m survive reranking anyway; a bounded heap selection is
+        # O(n log k) versus timsort's O(n log n) over the full candidate set
+        results_with_scores = heapq.nlargest(self.cfg.get("top_m", 20),
+                                             results_with_scores, key=lambda x: x[1])
+
         logger.info(f"Enhanced filtering: {len(results_with_scores)} results after boosting")
         return results_with_scores
 
@@ -214,13 +524,49 @@ class ImprovedHybridRetriever:
             
             if not candidates:
                 return []
-            
-            # Prepare reranking pairs
-            pairs = [[query, doc.page_content] for doc, _ in candidates]
-            
-            # Get reranking scores
+
+            # Skip the cross-encoder forward entirely when one candidate
+            # dominates after enhanced filtering - reranking rarely reorders
+            # the top-1 in that case and the transformer is the latency floor
+            skip_gap = self.cfg.get("rerank_skip_gap", 0.5)
+            if len(candidates) >= 2 and candidates[0][1] - candidates[1][1] > skip_gap:
+                top_k = self.cfg.get("top_k", 10)
+                logger.info(f"Skipping rerank: enhanced-score gap "
+                            f"{candidates[0][1] - candidates[1][1]:.2f} > {skip_gap}")
+                return [(enhanced_score, (doc, enhanced_score))
+                        for doc, enhanced_score in candidates[:top_k]]
+
+            # Prepare reranking pairs (tuples are lighter than per-pair lists).
+            # Chunks cut from the same section can carry identical text - score
+            # each distinct passage once and fan the logit back out, saving
+            # transformer FLOPs proportional to the duplication rate.
+            # Passages are char-capped before tokenization: the model
+            # truncates to reranker_max_length anyway, so tokenizing past
+            # ~256 BPE tokens (~1200 chars) is pure waste. Dedup on the
+            # capped text so chunks differing only past the cap also merge.
+            uniq_pos: Dict[str, int] = {}
+            order = []
+            pairs = []
+            for doc, _ in candidates:
+                passage = doc.page_content[:self._CE_CHAR_CAP]
+                pos = uniq_pos.get(passage)
+                if pos is None:
+                    pos = len(pairs)
+                    uniq_pos[passage] = pos
+                    pairs.append((query, passage))
+                order.append(pos)
+
+            # Get reranking scores. Grow the batch to the next power of two
+            # covering all pairs (capped) so a typical candidate set runs in
+            # one forward pass instead of a full batch plus a ragged tail
             batch_size = self.cfg.get("reranker_batch_size", 16)
-            logits = self.rerank.predict(pairs, batch_size=batch_size, convert_to_numpy=True)
+            if len(pairs) > batch_size:
+                batch_size = min(1 << (len(pairs) - 1).bit_length(), 128)
+            with self._rerank_lock, self._amp_ctx():
+                logits = self.rerank.predict(pairs, batch_size=batch_size, convert_to_numpy=True)
+            if len(pairs) < len(candidates):
+                logger.debug("Deduplicated rerank pairs: %d -> %d", len(candidates), len(pairs))
+                logits = logits[np.asarray(order)]
             
             # Combine reranking scores with enhanced scores
             final_results = []
@@ -233,12 +579,9 @@ class ImprovedHybridRetriever:
                 if final_score >= min_score:
                     final_results.append((final_score, (doc, enhanced_score)))
             
-            # Sort by final combined score
-            final_results.sort(reverse=True)
-            
-            # Return top-k results
+            # Keep only the top-k by final combined score
             top_k = self.cfg.get("top_k", 10)
-            results = final_results[:top_k]
+            results = heapq.nlargest(top_k, final_results)
             
             logger.info(f"Reranked {len(candidates)} candidates, returning {len(results)} results")
             
@@ -254,6 +597,6 @@ class ImprovedHybridRetriever:
         except Exception as e:
             logger.error(f"Error in enhanced reranking: {str(e)}")
             # Fallback to original scores
-            sorted_results = sorted(filtered_results, key=lambda x: x[1], reverse=True)
             top_k = self.cfg.get("top_k", 10)
-            return [(item[1], item) for item in sorted_results[:top_k]] 
\ No newline at end of file
+            sorted_results = heapq.nlargest(top_k, filtered_results, key=lambda x: x[1])
+            return [(item[1], item) for item in sorted_results] 
\ No newline at end of file
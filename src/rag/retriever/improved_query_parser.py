@@ -66,10 +66,36 @@ SEMANTIC_CATEGORIES = {
 
 # Temporal keyword detection for deadline queries
 TEMPORAL_KEYWORDS = [
-    "when", "deadline", "due", "date", "period", "timeline", "schedule", 
+    "when", "deadline", "due", "date", "period", "timeline", "schedule",
     "winter", "summer", "semester", "application period", "until"
 ]
 
+# Compile all patterns once at import instead of re.search(str, ...) per call
+_PROGRAM_PATTERNS_C = [(re.compile(pat, re.I), slug)
+                       for pat, slug in PROGRAM_PATTERNS.items()]
+
+_DEGREE_CLEAN_RE = re.compile(r'\b(master|bachelor|msc|bsc|phd|degree|program)\b')
+
+_DEGREE_PATTERNS_C = [
+    (re.compile(r"\bmaster\b|\bmsc\b|\bm\.sc\.?\b"), "msc"),
+    (re.compile(r"\bbachelor\b|\bbsc\b|\bb\.sc\.?\b"), "bsc"),
+    (re.compile(r"\bphd\b|\bdoctor|\bdoctoral\b"), "phd")
+]
+
+# Per-intent keyword alternations: one sweep per intent instead of a
+# substring probe per keyword; longer terms first so they win over prefixes.
+# The optional s keeps the plural hits the old substring probe caught
+# ("deadlines", "fees", ...) while the group still captures the singular,
+# so the boost comparisons downstream match unchanged.
+_INTENT_KEYWORD_RES = {
+    name: re.compile(r'\b(' + '|'.join(
+        re.escape(k) for k in sorted(data["keywords"], key=len, reverse=True)) + r')s?\b')
+    for name, data in SEMANTIC_CATEGORIES.items()
+}
+
+_CAPITALIZED_RE = re.compile(r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\b')
+_TECHNICAL_TERMS_RE = re.compile(r'\b(engineering|science|informatics|mathematics|physics|chemistry)\b')
+
 def enhanced_parse_query(query: str) -> QueryIntent:
     """
     Enhanced query parsing with better semantic understanding
@@ -104,12 +130,12 @@ def enhanced_parse_query(query: str) -> QueryIntent:
 
 def _extract_program_enhanced(query: str) -> str:
     """Enhanced program extraction with fuzzy matching"""
-    query_clean = re.sub(r'\b(master|bachelor|msc|bsc|phd|degree|program)\b', '', query.lower())
-    
+    query_clean = _DEGREE_CLEAN_RE.sub('', query.lower())
+
     # Check exact patterns first
-    for pattern, slug in PROGRAM_PATTERNS.items():
-        if re.search(pattern, query_clean, re.I):
-            logger.debug(f"Matched program pattern '{pattern}' -> '{slug}'")
+    for pattern, slug in _PROGRAM_PATTERNS_C:
+        if pattern.search(query_clean):
+            logger.debug(f"Matched program pattern '{pattern.pattern}' -> '{slug}'")
             return slug
     
     # Fuzzy matching for common terms
@@ -130,14 +156,8 @@ def _extract_program_enhanced(query: str) -> str:
 
 def _extract_degree(query_lower: str) -> str:
     """Extract degree type"""
-    degree_patterns = {
-        r"\bmaster\b|\bmsc\b|\bm\.sc\.?\b": "msc",
-        r"\bbachelor\b|\bbsc\b|\bb\.sc\.?\b": "bsc", 
-        r"\bphd\b|\bdoctor|\bdoctoral\b": "phd"
-    }
-    
-    for pattern, degree in degree_patterns.items():
-        if re.search(pattern, query_lower):
+    for pattern, degree in _DEGREE_PATTERNS_C:
+        if pattern.search(query_lower):
             return degree
     return ""
 
@@ -147,15 +167,14 @@ def _detect_semantic_intent(query_lower: str) -> Dict[str, str]:
     
     for intent_name, intent_data in SEMANTIC_CATEGORIES.items():
         score = 0
-        for keyword in intent_data["keywords"]:
-            if keyword in query_lower:
-                # Boost score based on keyword importance
-                if keyword in ["deadline", "when", "apply", "how to"]:
-                    score += 3
-                elif keyword in ["documents", "requirements", "cost"]:
-                    score += 2
-                else:
-                    score += 1
+        for keyword in set(_INTENT_KEYWORD_RES[intent_name].findall(query_lower)):
+            # Boost score based on keyword importance
+            if keyword in ("deadline", "when", "apply", "how to"):
+                score += 3
+            elif keyword in ("documents", "requirements", "cost"):
+                score += 2
+            else:
+                score += 1
         
         if score > 0:
             intent_scores[intent_name] = {
@@ -181,11 +200,11 @@ def _extract_entities(query: str) -> List[str]:
     entities = []
     
     # Capitalized words (potential program names)
-    capitalized = re.findall(r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\b', query)
+    capitalized = _CAPITALIZED_RE.findall(query)
     entities.extend(capitalized)
-    
+
     # Technical terms
-    technical_terms = re.findall(r'\b(engineering|science|informatics|mathematics|physics|chemistry)\b', query.lower())
+    technical_terms = _TECHNICAL_TERMS_RE.findall(query.lower())
     entities.extend(technical_terms)
     
     return list(set(entities))
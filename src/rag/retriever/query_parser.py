@@ -61,6 +61,53 @@ for category, terms in ACTION_CAT.items():
     for term in terms:
         CATEGORY_LOOKUP[term] = category
 
+# One alternation over every category keyword: a single C-level sweep of the
+# query replaces tokenizing plus a per-token dict probe, and (unlike the old
+# token scan) can hit multi-word terms like "key data". Longer terms come
+# first so they win over their single-word prefixes.
+KEYWORD_RE = re.compile(
+    r'\b(' + '|'.join(re.escape(k) for k in sorted(CATEGORY_LOOKUP, key=len, reverse=True)) + r')\b')
+
+# Compile every pattern once at import - re's internal cache is small and
+# still pays a dict probe per re.search(str, ...) call
+_DEGREE_PATTERNS = [(re.compile(pat), deg) for pat, deg in DEGREE_MAP.items()]
+
+_APPLY_INTENT_PATTERNS = [
+    re.compile(r'\b(how|where|when)\s+to\s+(apply|register|submit|enroll)'),
+    re.compile(r'\b(application|admission)s?\s+(process|procedure|steps|requirements)'),
+    re.compile(r'\b(what|which)\s+(documents|papers|certificates).+\b(need|require)')
+]
+
+_NONWORD_RE = re.compile(r'\W+')
+
+# Special case patterns for common programs
+_SPECIAL_PROGRAMS = [
+    (re.compile(r"\binformation\s+engineering\b", re.I), "information-engineering"),
+    (re.compile(r"\bcomputer\s+science\b", re.I), "computer-science"),
+    (re.compile(r"\bdata\s+engineering\b", re.I), "data-engineering"),
+    (re.compile(r"\binformatics\b", re.I), "informatics"),
+    (re.compile(r"\bmathematics\b", re.I), "mathematics"),
+    (re.compile(r"\belectrical\s+engineering\b", re.I), "electrical-engineering")
+]
+
+_PROGRAM_PATTERNS = [
+    # Pattern for "for X master/bachelor"
+    re.compile(r'for\s+([A-Z][\w\s&-]+?)\s+(?:master|bachelor|msc|bsc|phd|ma|ba)', re.I),
+    # Pattern for "X program/degree/master"
+    re.compile(r'([A-Z][\w\s&-]+?)\s+(?:program|degree|master|bachelor|course|study)', re.I),
+    # Pattern for "studying/taking X"
+    re.compile(r'(?:studying|taking|about)\s+([A-Z][\w\s&-]+?)(?:\s+|$)', re.I),
+    # Pattern for "X at TUM"
+    re.compile(r'([A-Z][\w\s&-]+?)\s+(?:at|in|from)\s+(?:TUM|Technical University)', re.I),
+    # Fallback pattern - try to find any capitalized phrase
+    re.compile(r'\b([A-Z][\w\s&-]{2,}?)\b', re.I)
+]
+
+_TECHNICAL_CONTEXTS = [
+    (kw, re.compile(r'(\w+\s+)?' + kw + r'(\s+\w+)?'))
+    for kw in ("engineering", "science", "informatics", "mathematics", "physics", "chemistry")
+]
+
 def parse_query(q: str) -> Dict[str, str]:
     """
     Parse a natural language query to extract structured filters.
@@ -79,25 +126,21 @@ def parse_query(q: str) -> Dict[str, str]:
         
         # 1. Extract degree information
         degree = ""
-        for pat, deg in DEGREE_MAP.items():
-            if re.search(pat, q_low):
+        for pat, deg in _DEGREE_PATTERNS:
+            if pat.search(q_low):
                 degree = deg
                 break
 
         # 2. Extract category based on action/intent keywords
         # Special case: "How to apply" or similar application-focused queries
-        if re.search(r'\b(how|where|when)\s+to\s+(apply|register|submit|enroll)', q_low) or \
-           re.search(r'\b(application|admission)s?\s+(process|procedure|steps|requirements)', q_low) or \
-           re.search(r'\b(what|which)\s+(documents|papers|certificates).+\b(need|require)', q_low):
+        if any(pat.search(q_low) for pat in _APPLY_INTENT_PATTERNS):
             category = "apply"
             logger.debug(f"Detected application intent from query pattern: '{q}'")
         else:
-            # Standard category detection
-            category_matches = []
-            for word in re.findall(r'\b\w+\b', q_low):
-                if word in CATEGORY_LOOKUP:
-                    category_matches.append(CATEGORY_LOOKUP[word])
-                    
+            # Standard category detection - one regex sweep finds all hits
+            category_matches = [CATEGORY_LOOKUP[m.group(1)]
+                                for m in KEYWORD_RE.finditer(q_low)]
+
             # Use the most frequent category, or empty if none found
             category = _most_frequent(category_matches) if category_matches else ""
 
@@ -122,53 +165,29 @@ def _extract_program_slug(query: str) -> str:
     Returns:
         Normalized program slug or empty string if not found
     """
-    # Special case patterns for common programs
-    special_programs = {
-        r"\binformation\s+engineering\b": "information-engineering",
-        r"\bcomputer\s+science\b": "computer-science",
-        r"\bdata\s+engineering\b": "data-engineering",
-        r"\binformatics\b": "informatics",
-        r"\bmathematics\b": "mathematics",
-        r"\belectrical\s+engineering\b": "electrical-engineering"
-    }
-    
     # First check for exact program names
     query_lower = query.lower()
-    for pattern, slug in special_programs.items():
-        if re.search(pattern, query_lower, re.I):
-            logger.debug(f"Matched special program pattern '{pattern}' -> '{slug}'")
+    for pattern, slug in _SPECIAL_PROGRAMS:
+        if pattern.search(query_lower):
+            logger.debug(f"Matched special program pattern '{pattern.pattern}' -> '{slug}'")
             return slug
-    
+
     # Regular patterns
-    patterns = [
-        # Pattern for "for X master/bachelor"
-        r'for\s+([A-Z][\w\s&-]+?)\s+(?:master|bachelor|msc|bsc|phd|ma|ba)',
-        # Pattern for "X program/degree/master"
-        r'([A-Z][\w\s&-]+?)\s+(?:program|degree|master|bachelor|course|study)',
-        # Pattern for "studying/taking X"
-        r'(?:studying|taking|about)\s+([A-Z][\w\s&-]+?)(?:\s+|$)',
-        # Pattern for "X at TUM"
-        r'([A-Z][\w\s&-]+?)\s+(?:at|in|from)\s+(?:TUM|Technical University)',
-        # Fallback pattern - try to find any capitalized phrase
-        r'\b([A-Z][\w\s&-]{2,}?)\b'
-    ]
-    
-    for pattern in patterns:
-        m = re.search(pattern, query, re.I)
+    for pattern in _PROGRAM_PATTERNS:
+        m = pattern.search(query)
         if m:
             # Normalize slug: lowercase, replace non-word chars with hyphens
-            return re.sub(r'\W+', '-', m.group(1).strip().lower())
-    
+            return _NONWORD_RE.sub('-', m.group(1).strip().lower())
+
     # Last resort - look for technical terms
-    technical_keywords = ["engineering", "science", "informatics", "mathematics", "physics", "chemistry"]
-    for kw in technical_keywords:
+    for kw, context_pat in _TECHNICAL_CONTEXTS:
         if kw in query_lower:
             # Look for words around the keyword
-            context = re.search(r'(\w+\s+)?' + kw + r'(\s+\w+)?', query_lower)
+            context = context_pat.search(query_lower)
             if context:
                 match = context.group(0).strip()
-                return re.sub(r'\W+', '-', match)
-    
+                return _NONWORD_RE.sub('-', match)
+
     return ""
 
 def _most_frequent(items: List[str]) -> str:
@@ -7,6 +7,7 @@ Test script to compare original vs improved retrieval performance
 import os
 import sys
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from typing import List
 
 # Add src to path
@@ -57,7 +58,10 @@ def test_retrieval_comparison():
         "Application documents for Computer Science",
         "Credits required for Data Engineering master"
     ]
-    
+    # Dedup while keeping order: a repeated entry would re-run the full
+    # embed + search + rerank path for no extra signal
+    test_queries = list(dict.fromkeys(test_queries))
+
     print("\n" + "=" * 80)
     print("RETRIEVAL COMPARISON")
     print("=" * 80)
@@ -67,49 +71,66 @@ def test_retrieval_comparison():
         original_retriever = HybridRetriever("src/rag/config/retriever.yaml")
         print("✓ Original retriever initialized")
         
-        improved_retriever = ImprovedHybridRetriever("src/rag/config/improved_retriever.yaml") 
-        print("✓ Improved retriever initialized")
+        # Both configs use the same reranker model; share the loaded weights
+        # instead of paying the multi-second CrossEncoder load twice
+        improved_retriever = ImprovedHybridRetriever("src/rag/config/improved_retriever.yaml",
+                                                     reranker=original_retriever.rerank)
+        print("✓ Improved retriever initialized (shared reranker)")
         
     except Exception as e:
         print(f"❌ Error initializing retrievers: {e}")
         print("Make sure the vector indices are built and config paths are correct")
         return
     
-    for query in test_queries:
-        print(f"\n{'='*20} Query: '{query}' {'='*20}")
-        
-        # Original retrieval
-        print(f"\n--- ORIGINAL RETRIEVAL ---")
+    # Run each system once over the whole query list: retrieve_batch embeds
+    # all queries in a single call and does one multi-row FAISS search,
+    # instead of paying an embedding round-trip per query
+    def run_original():
+        filters_list = [parse_query(q) for q in test_queries]
+        return original_retriever.retrieve_batch(test_queries, filters_list)
+
+    def run_improved():
+        return improved_retriever.retrieve_batch(test_queries, enhanced_parsing=True)
+
+    # The two systems share no mutable state and spend their time in
+    # GIL-releasing code (embedding HTTP wait, FAISS search, reranker
+    # forward), so overlap them on a small thread pool
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        f_original = pool.submit(run_original)
+        f_improved = pool.submit(run_improved)
         try:
-            original_filters = parse_query(query)
-            original_results = original_retriever.retrieve(query, original_filters)
-            
-            print(f"Found {len(original_results)} results")
-            for i, (score, (doc, base_score)) in enumerate(original_results[:3], 1):
-                meta = doc.metadata
-                content_preview = doc.page_content[:100].replace('\n', ' ')
-                print(f"{i}. Score: {score:.3f} | {meta.get('program', 'N/A')} | "
-                      f"{meta.get('category', 'N/A')} | {meta.get('section', 'N/A')}")
-                print(f"   Content: {content_preview}...")
-                
+            original_batch = f_original.result()
         except Exception as e:
-            print(f"❌ Original retrieval error: {e}")
-        
-        # Improved retrieval 
-        print(f"\n--- IMPROVED RETRIEVAL ---")
+            print(f"❌ Original batched retrieval error: {e}")
+            original_batch = [[] for _ in test_queries]
         try:
-            improved_results = improved_retriever.retrieve(query, enhanced_parsing=True)
-            
-            print(f"Found {len(improved_results)} results")
-            for i, (score, (doc, base_score)) in enumerate(improved_results[:3], 1):
-                meta = doc.metadata
-                content_preview = doc.page_content[:100].replace('\n', ' ')
-                print(f"{i}. Score: {score:.3f} | {meta.get('program', 'N/A')} | "
-                      f"{meta.get('category', 'N/A')} | {meta.get('section', 'N/A')}")
-                print(f"   Content: {content_preview}...")
-                
+            improved_batch = f_improved.result()
         except Exception as e:
-            print(f"❌ Improved retrieval error: {e}")
+            print(f"❌ Improved batched retrieval error: {e}")
+            improved_batch = [[] for _ in test_queries]
+
+    for query, original_results, improved_results in zip(test_queries, original_batch, improved_batch):
+        print(f"\n{'='*20} Query: '{query}' {'='*20}")
+
+        # Original retrieval
+        print(f"\n--- ORIGINAL RETRIEVAL ---")
+        print(f"Found {len(original_results)} results")
+        for i, (score, (doc, base_score)) in enumerate(original_results[:3], 1):
+            meta = doc.metadata
+            content_preview = doc.page_content[:100].replace('\n', ' ')
+            print(f"{i}. Score: {score:.3f} | {meta.get('program', 'N/A')} | "
+                  f"{meta.get('category', 'N/A')} | {meta.get('section', 'N/A')}")
+            print(f"   Content: {content_preview}...")
+
+        # Improved retrieval
+        print(f"\n--- IMPROVED RETRIEVAL ---")
+        print(f"Found {len(improved_results)} results")
+        for i, (score, (doc, base_score)) in enumerate(improved_results[:3], 1):
+            meta = doc.metadata
+            content_preview = doc.page_content[:100].replace('\n', ' ')
+            print(f"{i}. Score: {score:.3f} | {meta.get('program', 'N/A')} | "
+                  f"{meta.get('category', 'N/A')} | {meta.get('section', 'N/A')}")
+            print(f"   Content: {content_preview}...")
 
 def main():
     """Run all tests"""